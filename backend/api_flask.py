@@ -1,5 +1,5 @@
 import shutil
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, request, jsonify, send_file, Response
 from flask_cors import CORS
 import threading
 import uuid
@@ -7,10 +7,19 @@ import json
 import os
 from datetime import datetime
 import time
+from collections import OrderedDict
 
 # Import des modules locaux (ils sont dans le même dossier backend/)
-from scanner_vulnerabilites_v2 import VulnerabilityScannerV2
+from scanner_vulnerabilites_v2 import VulnerabilityScannerV2, thread_pool_size
 from vuln_explainer import explain_vulnerability
+from http_transport import HttpTransport
+from scan_checkpoint import load_checkpoint
+from port_scanner import PORT_PROFILES
+from recon_cache import ReconCache
+from scan_scheduler import ScanScheduler, QueueFull, PRIORITIES
+from scan_events import ScanEvents, EVENTS_FILE, sse_stream, summarize
+from history_store import HistoryStore, SEVERITIES, history_item, scan_summary, summary_from_checkpoint, checkpoint_counts, checkpoint_sizes
+from findings_store import has_findings, write_findings, read_findings, count_findings, severity_of, severity_stats
 
 app = Flask(__name__)
 CORS(app)
@@ -29,65 +38,297 @@ if not os.path.exists(SCANS_DIR):
 # --- 2. VARIABLES GLOBALES (C'est ce qui manquait !) ---
 active_scans = {}
 
+# Threads des scans démarrés, pour l'arrêt coopératif (annulation, pause)
+scan_threads = {}
+
+# Journal d'événements de chaque scan du processus (flux SSE, ?since=),
+# écrit aussi dans events.jsonl du dossier du scan ; retiré à la fin du scan
+scan_events = {}
+
+# Journaux de scans terminés relus depuis events.jsonl : les derniers consultés
+# restent en mémoire (clients qui interrogent ?since= en boucle), tant que
+# la taille du fichier ne change pas
+FINISHED_LOGS_SIZE = 16
+finished_logs = OrderedDict()
+finished_logs_lock = threading.Lock()
+
+# Compteurs de progression publiés au plus toutes les PROGRESS_INTERVAL s,
+# sauf changement du pourcentage (le pipeline en signale à chaque tâche)
+PROGRESS_INTERVAL = 0.5
+
+# Transport HTTP partagé entre les scans (pools keep-alive par hôte)
+TRANSPORT = HttpTransport()
+
+# Cache de recon par hôte (ports, certificat TLS, en-tête Server), conservé entre redémarrages
+RECON_CACHE = ReconCache(os.path.join(SCANS_DIR, "recon_cache.json"))
+
+# Index SQLite de l'historique ; au démarrage, les dossiers pas encore indexés
+# (tous au premier lancement) sont lus une fois
+HISTORY_DB = os.path.join(SCANS_DIR, "history.db")
+HISTORY = HistoryStore(HISTORY_DB)
+indexed = HISTORY.sync(SCANS_DIR)
+if indexed:
+    print(f"[+] Historique : {indexed} scans indexés")
+
+# Taille de page de /api/history (par défaut, maximum)
+HISTORY_PAGE_SIZE = 20
+HISTORY_MAX_PAGE_SIZE = 200
+
+# Taille de page de /api/scan/<id>/findings (par défaut, maximum)
+FINDINGS_PAGE_SIZE = 50
+FINDINGS_MAX_PAGE_SIZE = 500
+findings_lock = threading.Lock()
+
+# File d'attente des scans : 3 scans actifs au plus, 20 en attente, et un budget
+# de 40 requêtes simultanées partagé équitablement entre les scans actifs ; les
+# scans async (coroutines) ont leur propre budget, celui du connecteur aiohttp
+SCHEDULER = ScanScheduler(max_running=3, max_queued=20, worker_budget=40,
+                          async_budget=TRANSPORT.async_limit)
+
+def publish_queue_position(scan_id, position):
+    # Le rang d'un scan en attente change à chaque départ ou annulation : le
+    # client le reçoit par son flux d'événements (pas de status, qui pourrait
+    # arriver après le 'starting' du même scan)
+    if scan_id in scan_events:
+        scan_events[scan_id].publish('status', {'queue_position': position})
+
+SCHEDULER.on_position = publish_queue_position
+
+# Requêtes en vol demandées par défaut par un scan async (max_concurrency)
+ASYNC_CONCURRENCY = 500
+
+# Options numériques : (type, minimum, maximum) ; une valeur hors bornes est
+# ramenée dans les bornes, une valeur illisible refusée (400)
+NUMERIC_OPTIONS = {
+    'max_concurrency': (int, 1, SCHEDULER.async_budget),
+    'crawl_depth': (int, 1, 10),
+    'crawl_max_pages': (int, 1, 10000),
+    'crawl_fanout': (int, 1, 1000),
+    'crawl_workers': (int, 1, SCHEDULER.worker_budget),
+    'adaptive_max_workers': (int, 1, SCHEDULER.worker_budget),
+    'probe_per_template': (int, 0, 1000),
+    'max_body_bytes': (int, 1024, 16 * 1048576),
+    'port_timeout': (float, 0.1, 10.0),
+}
+
+# Options du scanner acceptées telles quelles par /api/scan/start
+SCAN_OPTIONS = ('engine', 'max_concurrency', 'crawl_depth', 'crawl_max_pages', 'crawl_fanout', 'crawl_workers', 'pipeline',
+                'probe_per_template', 'stream_bodies', 'max_body_bytes',
+                'adaptive', 'adaptive_max_workers', 'batch_params', 'incremental', 'port_profile', 'ports', 'port_timeout',
+                'refresh_recon', 'gzip_results')
+
 # --- 3. FONCTIONS UTILITAIRES ---
 
 def get_directory_for_scan(scan_id):
     """Retourne le chemin du dossier pour un ID donné"""
     return os.path.join(SCANS_DIR, scan_id)
 
-def load_history_from_disk():
-    """Lit le disque pour reconstruire l'historique complet"""
-    history = []
-    
-    if not os.path.exists(SCANS_DIR):
-        return []
-        
-    for folder_name in os.listdir(SCANS_DIR):
-        folder_path = os.path.join(SCANS_DIR, folder_name)
-        
-        if os.path.isdir(folder_path):
-            json_path = os.path.join(folder_path, "rapport_scan_v2.json")
-            
-            if os.path.exists(json_path):
-                try:
-                    with open(json_path, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                        
-                        scan_date = data.get('scan_date', '')
-                        try:
-                            dt = datetime.fromisoformat(scan_date)
-                            date_str = dt.strftime('%d/%m/%Y')
-                            time_str = dt.strftime('%H:%M:%S')
-                        except:
-                            date_str = "Inconnu"
-                            time_str = ""
-
-                        history.append({
-                            'id': folder_name,
-                            'scan_id': folder_name, # Important pour le frontend
-                            'url': data.get('target', 'Inconnu'),
-                            'date': date_str,
-                            'time': time_str,
-                            'vulnerabilities': data.get('total_vulnerabilities', 0),
-                            'status': 'completed'
-                        })
-                except Exception as e:
-                    print(f"[WARN] Erreur lecture historique {folder_name}: {e}")
+def ensure_findings(folder):
+    """Index des vulnérabilités d'un scan archivé ; construit une seule fois
+    depuis le rapport JSON pour les scans antérieurs à l'index."""
+    with findings_lock:
+        if has_findings(folder):
+            return True
+        json_path = os.path.join(folder, "rapport_scan_v2.json")
+        if not os.path.exists(json_path):
+            return False
+        with open(json_path, 'r', encoding='utf-8') as f:
+            write_findings(folder, json.load(f).get('vulnerabilities', []))
+        return True
 
-    # Tri du plus récent au plus ancien
-    return sorted(history, key=lambda x: x['date'], reverse=True)
+def checkpoint_findings(folder, state):
+    """Nombre de vulnérabilités d'un point de reprise et leur première page,
+    lue dans findings.jsonl (le point de reprise ne contient que le nombre)."""
+    total = sum(checkpoint_counts(state).values())
+    return total, read_findings(folder, limit=min(FINDINGS_PAGE_SIZE, total))
+
+def bounded(value, kind, low, high):
+    if isinstance(value, bool):
+        raise TypeError(value)
+    return max(low, min(kind(value), high))
+
+def check_options(options):
+    """Convertit et borne les options numériques d'un scan (crawl_fanout :
+    entier ou liste par profondeur). Retourne un message d'erreur, None si
+    toutes sont valides."""
+    for key, (kind, low, high) in NUMERIC_OPTIONS.items():
+        if key not in options:
+            continue
+        value = options[key]
+        try:
+            if key == 'crawl_fanout' and isinstance(value, list):
+                options[key] = [bounded(item, kind, low, high) for item in value]
+            else:
+                options[key] = bounded(value, kind, low, high)
+        except (ValueError, TypeError):
+            return f"Option {key} invalide"
+    if 'ports' in options:
+        ports = options['ports']
+        try:
+            if not isinstance(ports, list):
+                raise TypeError(ports)
+            options['ports'] = [bounded(port, int, 1, 65535) for port in ports]
+        except (ValueError, TypeError):
+            return 'Liste de ports invalide'
+    return None
+
+def schedule_scan(scan_id, url, threads, options, priority='normal', resume=False):
+    """Met le scan en file ; son thread démarre quand l'ordonnanceur lui attribue un créneau.
+    Dossier et journal ne sont créés qu'une fois la place obtenue : un refus
+    (QueueFull) ne laisse rien sur le disque."""
+    setup_lock = threading.Lock()
+    ready = []
+
+    def prepare():
+        # Appelé au démarrage (qui peut avoir lieu pendant submit) ou juste après submit
+        with setup_lock:
+            # Rien à créer pour un scan annulé entre submit et cet appel
+            if ready or active_scans.get(scan_id, {}).get('status') == 'cancelled':
+                return
+            folder = get_directory_for_scan(scan_id)
+            os.makedirs(folder, exist_ok=True)
+            if scan_id not in scan_events:
+                scan_events[scan_id] = ScanEvents(os.path.join(folder, EVENTS_FILE))
+            events = scan_events[scan_id]
+            events.reopen()
+            events.publish('status', {'status': 'queued', 'progress': 0,
+                                      'queue_position': SCHEDULER.job_status(scan_id).get('queue_position')})
+            ready.append(True)
+
+    def start(job):
+        prepare()
+        thread = ScanThread(scan_id, url, threads, options, resume=resume, worker_gate=job['gate'])
+        scan_threads[scan_id] = thread
+        thread.start()
+    # Un scan async demande max_concurrency requêtes en vol, pas threads workers
+    if options.get('engine') == 'async':
+        workers = min(options.get('max_concurrency', ASYNC_CONCURRENCY), SCHEDULER.async_budget)
+        SCHEDULER.submit(scan_id, workers, start, priority, pool='async')
+    else:
+        # En mode adaptatif, la borne haute que l'AIMD peut atteindre
+        workers = thread_pool_size(threads, options.get('adaptive'), options.get('adaptive_max_workers'))
+        SCHEDULER.submit(scan_id, min(workers, SCHEDULER.worker_budget), start, priority)
+    prepare()
+
+def cancel_active_scan(scan_id):
+    """Annule un scan en attente ou en cours ; retourne son nouveau statut (None s'il n'est pas actif)."""
+    scan = active_scans.get(scan_id)
+    if scan is None:
+        return None
+    if SCHEDULER.cancel(scan_id):
+        scan['status'] = 'cancelled'
+        if scan_id in scan_events:
+            scan_events[scan_id].close_file()
+        shutil.rmtree(get_directory_for_scan(scan_id), ignore_errors=True)
+        HISTORY.delete(scan_id)
+        if scan_id in scan_events:
+            scan_events[scan_id].publish('status', {'status': 'cancelled'})
+            scan_events[scan_id].close()
+        return 'cancelled'
+    thread = scan_threads.get(scan_id)
+    if thread is None:
+        return None
+    thread.stop('cancel')
+    scan['status'] = 'cancelling'
+    return 'cancelling'
 
 # --- 4. THREAD DE SCAN ---
 
 class ScanThread(threading.Thread):
-    def __init__(self, scan_id, target_url, max_workers):
+    def __init__(self, scan_id, target_url, max_workers, options=None, resume=False, worker_gate=None):
         threading.Thread.__init__(self)
         self.scan_id = scan_id
         self.target_url = target_url
         self.max_workers = max_workers
+        self.options = options or {}
+        self.resume = resume
+        self.worker_gate = worker_gate
+        # Entrée de active_scans mise à jour par le thread (reste valable si elle en est retirée)
+        self.state = active_scans[scan_id]
+        self.events = scan_events[scan_id]
+        self.stop_reason = None
         self.scanner = None
         self.daemon = True
+        # Champs modifiés pas encore publiés (progression regroupée)
+        self.unpublished = {}
+        self.published_at = 0
+        self.emit_lock = threading.Lock()
+
+    def emit(self, kind, throttle=False, **fields):
+        """Met à jour l'état du scan et publie les champs modifiés. Avec
+        throttle, la publication attend PROGRESS_INTERVAL s sauf si le
+        pourcentage change ; l'événement suivant reprend les champs en attente."""
+        with self.emit_lock:
+            for key, value in fields.items():
+                if self.state.get(key) != value:
+                    self.unpublished[key] = value
+            self.state.update(fields)
+            now = time.time()
+            if not self.unpublished:
+                return
+            if throttle and 'progress' not in self.unpublished and now - self.published_at < PROGRESS_INTERVAL:
+                return
+            changed, self.unpublished = self.unpublished, {}
+            self.published_at = now
+            self.events.publish(kind, changed)
+
+    def on_finding(self, index, vuln):
+        self.state['total_vulnerabilities'] = index + 1
+        self.events.publish('finding', {'index': index, 'vulnerability': vuln})
+
+    def on_url(self, url):
+        self.events.publish('url', {'url': url})
+
+    def on_test_progress(self, done, total):
+        """Progression 40 -> 80 % pendant les tests (hors pipeline)."""
+        self.emit('progress', throttle=True, progress=40 + int(40 * done / max(1, total)),
+                  tasks_completed=done, tasks_total=total)
         
+    def on_pipeline_progress(self, stats):
+        """Progression 20 -> 80 % calculée à partir des files du pipeline."""
+        done = stats['tasks_completed']
+        # Une tâche par cible (plan de sondes commun à tous les tests)
+        remaining = stats['tasks_pending'] + stats['targets_waiting']
+        if stats['crawl_running']:
+            # Chaque page encore dans la frontière du crawler produira au moins une cible
+            remaining += stats['crawl_frontier']
+        progress = 20 + int(60 * done / max(1, done + remaining))
+        self.emit('progress',
+                  throttle=True,
+                  progress=progress,
+                  pipeline=stats,
+                  crawled_urls_count=self.scanner.crawled_count,
+                  forms_count=self.scanner.forms_count)
+        
+    def stop(self, reason):
+        """Demande l'arrêt du scan ('cancel' ou 'pause'), pris en compte avant
+        la prochaine requête."""
+        self.stop_reason = reason
+        if self.scanner is not None:
+            self.scanner.request_stop(reason)
+
+    def on_stopped(self, final_folder):
+        """Fin d'un scan arrêté : la recon en cours se termine (timeouts bornés),
+        puis le point de reprise est conservé (pause) ou le dossier supprimé (annulation)."""
+        self.scanner.join_recon()
+        if self.scanner.results:
+            self.scanner.results.close()
+        if self.scanner.stop_reason == 'pause':
+            self.scanner.save_checkpoint(force=True)
+            HISTORY.record(summary_from_checkpoint(self.scan_id, self.scanner.checkpoint_state(),
+                                                   final_folder, status='paused'))
+            self.emit('status',
+                      status='paused',
+                      paused_at=datetime.now().isoformat(),
+                      crawled_urls_count=self.scanner.crawled_count)
+            print(f"[DEBUG] Scan {self.scan_id} en pause")
+        else:
+            self.events.close_file()
+            shutil.rmtree(final_folder, ignore_errors=True)
+            HISTORY.delete(self.scan_id)
+            self.emit('status', status='cancelled', cancelled_at=datetime.now().isoformat())
+            print(f"[DEBUG] Scan {self.scan_id} annulé")
+
     def run(self):
         try:
             print(f"\n[DEBUG] Démarrage du scan {self.scan_id}")
@@ -97,34 +338,68 @@ class ScanThread(threading.Thread):
             if not os.path.exists(final_folder):
                 os.makedirs(final_folder)
 
-            active_scans[self.scan_id]['status'] = 'running'
-            active_scans[self.scan_id]['progress'] = 10
+            if not self.stop_reason:
+                self.emit('status', status='running', phase='setup', progress=10)
             
             # Création du scanner avec dossier de sortie imposé
             self.scanner = VulnerabilityScannerV2(
                 self.target_url, 
                 self.max_workers, 
-                output_dir=final_folder
+                output_dir=final_folder,
+                transport=TRANSPORT,
+                recon_cache=RECON_CACHE,
+                history=HISTORY,
+                **self.options
             )
+            if self.worker_gate is not None:
+                self.scanner.worker_gate = self.worker_gate
+            if self.stop_reason:
+                self.scanner.request_stop(self.stop_reason)
+            # Paramètres du scan enregistrés dans les points de reprise
+            self.scanner.checkpoint_meta = {
+                'url': self.target_url,
+                'threads': self.max_workers,
+                'options': self.options,
+                'started_at': self.state.get('started_at')
+            }
+            if self.resume:
+                state = load_checkpoint(final_folder)
+                if state:
+                    self.scanner.restore_checkpoint(state)
+                # Scan de nouveau actif : retiré de l'historique jusqu'à sa fin
+                HISTORY.delete(self.scan_id)
+            if self.scanner.start_time is None:
+                self.scanner.start_time = time.time()
+            # Résultats dans findings.jsonl : GET /api/scan/<id> en renvoie la
+            # première page, le flux d'événements les suivants
+            self.state['vulnerabilities'] = []
+            self.state['total_vulnerabilities'] = self.scanner.findings_count
+            self.scanner.finding_listener = self.on_finding
+            self.scanner.url_listener = self.on_url
+            self.scanner.test_progress_callback = self.on_test_progress
             
-            # Phase 1: Crawl
-            active_scans[self.scan_id]['progress'] = 20
-            self.scanner.crawl_website(self.scanner.target_url)
-            
-            active_scans[self.scan_id].update({
-                'progress': 40,
-                'crawled_urls': list(self.scanner.crawled_urls),
-                'forms_found': self.scanner.forms
-            })
+            if self.scanner.pipeline:
+                # Phases 1+2 en pipeline : progression issue des files réelles
+                self.emit('status', phase='pipeline', progress=20)
+                self.scanner.scan_pipeline(progress_callback=self.on_pipeline_progress)
+            else:
+                # Phase 1: Crawl
+                self.emit('status', phase='crawl', progress=20)
+                self.scanner.crawl_website(self.scanner.target_url)
+                if self.scanner.stopping():
+                    return self.on_stopped(final_folder)
+                
+                self.emit('status', phase='tests', progress=40,
+                          crawled_urls_count=self.scanner.crawled_count,
+                          forms_count=self.scanner.forms_count)
+                
+                # Phase 2: Scan Vuln
+                self.scanner.scan_vulnerabilities_parallel()
             
-            # Phase 2: Scan Vuln
-            self.scanner.scan_vulnerabilities_parallel()
+            if self.scanner.stopping():
+                return self.on_stopped(final_folder)
             
-            active_scans[self.scan_id].update({
-                'progress': 80,
-                'vulnerabilities': self.scanner.vulnerabilities,
-                'total_vulnerabilities': len(self.scanner.vulnerabilities)
-            })
+            self.emit('status', phase='report', progress=80)
             
             # Phase 3: Rapport
             if not hasattr(self.scanner, 'start_time') or self.scanner.start_time is None:
@@ -132,24 +407,28 @@ class ScanThread(threading.Thread):
             
             self.scanner.generate_report()
 
-            # Stats Sévérité
-            severity_stats = {'CRITICAL': 0, 'HIGH': 0, 'MEDIUM': 0, 'LOW': 0}
-            for v in self.scanner.vulnerabilities:
-                sev = v.get('severity', 'LOW').upper()
-                # Sécurité pour les clés inconnues
-                if sev not in severity_stats: sev = 'LOW' 
-                severity_stats[sev] += 1
-            
+            # Stats Sévérité : taille des index de findings.jsonl, sans relire les vulnérabilités
+            counts = severity_stats(final_folder)
+
             # Fin
-            active_scans[self.scan_id].update({
-                'status': 'completed',
-                'progress': 100,
-                'report_dir': final_folder,
-                'severity_stats': severity_stats,
-                'crawled_urls_count': len(self.scanner.crawled_urls),
-                'forms_count': len(self.scanner.forms),
-                'completed_at': datetime.now().isoformat()
-            })
+            completed_at = datetime.now().isoformat()
+            HISTORY.record(scan_summary(
+                self.scan_id, self.scanner.target_url, 'completed', completed_at,
+                counts,
+                duration=self.scanner.scan_duration,
+                crawled_urls=self.scanner.crawled_count,
+                forms=self.scanner.forms_count,
+                report_dir=final_folder,
+                started_at=self.state.get('started_at')))
+            self.state['report_dir'] = final_folder
+            self.emit('status',
+                      status='completed',
+                      phase='done',
+                      progress=100,
+                      severity_stats=counts,
+                      crawled_urls_count=self.scanner.crawled_count,
+                      forms_count=self.scanner.forms_count,
+                      completed_at=completed_at)
             
             print(f"[DEBUG] Scan terminé. Rapport : {final_folder}")
             
@@ -157,11 +436,18 @@ class ScanThread(threading.Thread):
             import traceback
             print(f"[ERREUR] Scan {self.scan_id}: {e}")
             traceback.print_exc()
-            active_scans[self.scan_id].update({
-                'status': 'failed',
-                'error': str(e),
-                'progress': 0
-            })
+            self.emit('status', status='failed', error=str(e), progress=0)
+        finally:
+            # Libère le pool de connexions de l'hôte, le créneau et le budget de requêtes
+            if self.scanner is not None:
+                self.scanner.close_session()
+            scan_threads.pop(self.scan_id, None)
+            SCHEDULER.finish(self.scan_id)
+            # Journal libéré de la mémoire (relu depuis events.jsonl), sauf si
+            # le scan a déjà été relancé (reprise) et le réutilise
+            if active_scans.get(self.scan_id, self.state) is self.state:
+                self.events.close()
+                scan_events.pop(self.scan_id, None)
 
 # --- 5. ROUTES API ---
 
@@ -174,9 +460,23 @@ def start_scan():
     data = request.json
     url = data.get('url', '').strip()
     threads = data.get('threads', 5)
+    priority = data.get('priority', 'normal')
+    options = {key: data[key] for key in SCAN_OPTIONS if key in data}
     
     if not url: return jsonify({'error': 'URL requise'}), 400
     if not url.startswith(('http://', 'https://')): url = 'http://' + url
+    if options.get('engine', 'threads') not in ('threads', 'async'): return jsonify({'error': 'Moteur inconnu'}), 400
+    if options.get('incremental') not in (None, False, True, 'skip', 'smoke'): return jsonify({'error': 'Mode incrémental inconnu'}), 400
+    if options.get('port_profile', 'basic') not in tuple(PORT_PROFILES) + ('custom',): return jsonify({'error': 'Profil de ports inconnu'}), 400
+    if options.get('port_profile') == 'custom' and not options.get('ports'): return jsonify({'error': 'Liste de ports requise'}), 400
+    if priority not in PRIORITIES: return jsonify({'error': 'Priorité inconnue'}), 400
+    # Un scan ne peut pas demander plus que le budget global de requêtes
+    try:
+        threads = max(1, min(int(threads), SCHEDULER.worker_budget))
+    except (ValueError, TypeError):
+        return jsonify({'error': 'Nombre de threads invalide'}), 400
+    error = check_options(options)
+    if error: return jsonify({'error': error}), 400
     
     scan_id = str(uuid.uuid4())
     
@@ -184,77 +484,326 @@ def start_scan():
         'id': scan_id,
         'scan_id': scan_id, # Redondance pour sécurité frontend
         'url': url,
-        'status': 'starting',
+        'status': 'queued',
         'progress': 0,
         'threads': threads,
+        'priority': priority,
+        'options': options,
         'started_at': datetime.now().isoformat(),
         'vulnerabilities': [],
         'total_vulnerabilities': 0
     }
     
-    thread = ScanThread(scan_id, url, threads)
-    thread.start()
+    try:
+        schedule_scan(scan_id, url, threads, options, priority)
+    except QueueFull as e:
+        del active_scans[scan_id]
+        return jsonify({'error': str(e)}), 429
     
-    return jsonify({'scan_id': scan_id, 'url': url}), 201
+    return jsonify({'scan_id': scan_id, 'url': url, **SCHEDULER.job_status(scan_id)}), 201
+
+@app.route('/api/scan/<scan_id>/resume', methods=['POST'])
+def resume_scan(scan_id):
+    status = active_scans.get(scan_id, {}).get('status')
+    if status in ('queued', 'starting', 'running'):
+        return jsonify({'error': 'Scan déjà en cours'}), 409
+    if status in ('pausing', 'cancelling'):
+        return jsonify({'error': "Scan en cours d'arrêt"}), 409
+
+    folder = get_directory_for_scan(scan_id)
+    state = load_checkpoint(folder)
+    if state is None:
+        return jsonify({'error': 'Aucun point de reprise pour ce scan'}), 404
+    if state.get('completed'):
+        return jsonify({'error': 'Scan déjà terminé'}), 409
+
+    meta = state.get('meta', {})
+    url = meta.get('url') or state.get('target')
+    threads = meta.get('threads', 5)
+    options = meta.get('options', {})
+    priority = request.args.get('priority', 'normal')
+    if priority not in PRIORITIES:
+        return jsonify({'error': 'Priorité inconnue'}), 400
+    total, findings = checkpoint_findings(folder, state)
+
+    active_scans[scan_id] = {
+        'id': scan_id,
+        'scan_id': scan_id,
+        'url': url,
+        'status': 'queued',
+        'progress': 0,
+        'threads': threads,
+        'priority': priority,
+        'options': options,
+        'started_at': meta.get('started_at') or datetime.now().isoformat(),
+        'resumed_at': datetime.now().isoformat(),
+        'vulnerabilities': findings,
+        'total_vulnerabilities': total
+    }
+
+    try:
+        schedule_scan(scan_id, url, threads, options, priority, resume=True)
+    except QueueFull as e:
+        del active_scans[scan_id]
+        return jsonify({'error': str(e)}), 429
+
+    return jsonify({'scan_id': scan_id, 'url': url, 'resumed': True, **SCHEDULER.job_status(scan_id)}), 202
+
+@app.route('/api/scan/<scan_id>/cancel', methods=['POST'])
+def cancel_scan(scan_id):
+    if scan_id not in active_scans:
+        return jsonify({'error': 'Scan introuvable'}), 404
+    status = cancel_active_scan(scan_id)
+    if status is None:
+        return jsonify({'error': 'Scan non actif'}), 409
+    return jsonify({'scan_id': scan_id, 'status': status}), 202
+
+@app.route('/api/scan/<scan_id>/pause', methods=['POST'])
+def pause_scan(scan_id):
+    if scan_id not in active_scans:
+        return jsonify({'error': 'Scan introuvable'}), 404
+    thread = scan_threads.get(scan_id)
+    if thread is None:
+        return jsonify({'error': 'Scan non démarré'}), 409
+    thread.stop('pause')
+    active_scans[scan_id]['status'] = 'pausing'
+    # Reprise par POST /api/scan/<scan_id>/resume à partir du point de reprise
+    return jsonify({'scan_id': scan_id, 'status': 'pausing'}), 202
+
+def scan_log(scan_id):
+    """Journal d'un scan : en mémoire tant que son thread tourne, sinon relu
+    depuis events.jsonl une fois puis gardé dans finished_logs (None si le
+    scan n'en a pas)."""
+    events = scan_events.get(scan_id)
+    if events is not None:
+        return events
+    path = os.path.join(get_directory_for_scan(scan_id), EVENTS_FILE)
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        with finished_logs_lock:
+            finished_logs.pop(scan_id, None)
+        return None
+    with finished_logs_lock:
+        cached = finished_logs.get(scan_id)
+        if cached is not None and cached[0] == size:
+            finished_logs.move_to_end(scan_id)
+            return cached[1]
+    events = ScanEvents(path)
+    events.close()
+    with finished_logs_lock:
+        finished_logs[scan_id] = (size, events)
+        finished_logs.move_to_end(scan_id)
+        while len(finished_logs) > FINISHED_LOGS_SIZE:
+            finished_logs.popitem(last=False)
+    return events
+
+@app.route('/api/scan/<scan_id>/events', methods=['GET'])
+def stream_scan_events(scan_id):
+    """Flux SSE des événements du scan à partir de ?cursor= (ou Last-Event-ID
+    lors d'une reconnexion) : status, progress, finding, puis end."""
+    events = scan_log(scan_id)
+    if events is None:
+        return jsonify({'error': 'Aucun flux pour ce scan'}), 404
+    cursor = request.headers.get('Last-Event-ID') or request.args.get('cursor', 0)
+    try:
+        cursor = max(0, int(cursor))
+    except ValueError:
+        return jsonify({'error': 'Curseur invalide'}), 400
+    headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    return Response(sse_stream(events, cursor), mimetype='text/event-stream', headers=headers)
+
+def scan_delta(scan_id, since):
+    """Réponse de GET /api/scan/<id>?since= : changements depuis le curseur
+    since, lus dans le journal du scan (en mémoire ou events.jsonl)."""
+    events = scan_log(scan_id)
+    if events is None:
+        return jsonify({'error': 'Aucun journal pour ce scan'}), 404
+    new_events, cursor = events.read(since)
+    delta = summarize(new_events)
+    status = active_scans.get(scan_id, {}).get('status')
+    if status is None:
+        status = next((event['data']['status'] for event in reversed(events.events)
+                       if 'status' in event['data']), None)
+    return jsonify(dict(delta,
+                        scan_id=scan_id,
+                        status=status,
+                        since=since,
+                        cursor=cursor))
 
 @app.route('/api/scan/<scan_id>', methods=['GET'])
 def get_scan_status(scan_id):
+    # 0. Seulement les changements depuis un curseur (?since=)
+    since = request.args.get('since')
+    if since is not None:
+        try:
+            since = max(0, int(since))
+        except ValueError:
+            return jsonify({'error': 'Curseur invalide'}), 400
+        return scan_delta(scan_id, since)
+
     # 1. Scan Actif
     if scan_id in active_scans:
+        # Curseur lu avant la copie : les événements suivants peuvent répéter
+        # des résultats déjà présents (le client les ignore grâce à leur index)
+        events = scan_log(scan_id)
+        cursor = events.cursor() if events else None
         data = active_scans[scan_id].copy()
+        folder_path = get_directory_for_scan(scan_id)
+        if data.get('status') != 'queued' and has_findings(folder_path):
+            # Première page lue dans findings.jsonl (les suivantes via /findings),
+            # total compté après le curseur : les événements antérieurs sont ignorés.
+            # Reprise en file d'attente : page du point de reprise (fichier pas encore tronqué)
+            data['vulnerabilities'] = read_findings(folder_path, limit=FINDINGS_PAGE_SIZE)
+            data['total_vulnerabilities'] = max(data.get('total_vulnerabilities', 0), count_findings(folder_path))
+        else:
+            data['vulnerabilities'] = list(data.get('vulnerabilities', []))
+        total = data.get('total_vulnerabilities', 0)
+        data['findings_next_offset'] = len(data['vulnerabilities']) if len(data['vulnerabilities']) < total else None
         data['scan_id'] = scan_id 
+        data['event_cursor'] = cursor
+        # Position dans la file, attente et part du budget de requêtes
+        data.update(SCHEDULER.job_status(scan_id))
         return jsonify(data)
     
-    # 2. Scan Archivé
+    # 2. Scan Archivé : résumé lu dans l'index, première page de vulnérabilités
+    # (les suivantes via /api/scan/<id>/findings)
     folder_path = get_directory_for_scan(scan_id)
     json_path = os.path.join(folder_path, "rapport_scan_v2.json")
     
     if os.path.exists(json_path):
         try:
-            with open(json_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                
-            vulnerabilities = data.get('vulnerabilities', [])
-            
-            severity_stats = {'CRITICAL': 0, 'HIGH': 0, 'MEDIUM': 0, 'LOW': 0}
-            for v in vulnerabilities:
-                sev = v.get('severity', 'LOW').upper()
-                if sev not in severity_stats: sev = 'LOW'
-                severity_stats[sev] += 1
+            row = HISTORY.get(scan_id)
+            if row is None or row['status'] != 'completed':
+                row = HISTORY.read_folder(scan_id, folder_path)
+                HISTORY.record(row)
+            ensure_findings(folder_path)
+            vulnerabilities = read_findings(folder_path, limit=FINDINGS_PAGE_SIZE)
 
             reconstructed_scan = {
                 'scan_id': scan_id,
-                'url': data.get('target'),
+                'url': row['target'],
                 'status': 'completed',
                 'progress': 100,
-                'threads': data.get('performance', {}).get('threads_used', 0),
-                'started_at': data.get('scan_date'),
-                'completed_at': data.get('scan_date'),
-                'total_vulnerabilities': data.get('total_vulnerabilities', 0),
+                'started_at': row['started_at'] or row['completed_at'],
+                'completed_at': row['completed_at'],
+                'duration': row['duration'],
+                'total_vulnerabilities': row['total_vulnerabilities'],
                 'vulnerabilities': vulnerabilities,
-                'crawled_urls_count': len(data.get('crawled_urls', [])),
-                'forms_count': len(data.get('forms_found', [])),
-                'severity_stats': severity_stats,
+                'findings_next_offset': len(vulnerabilities) if len(vulnerabilities) < row['total_vulnerabilities'] else None,
+                'crawled_urls_count': row['crawled_urls'],
+                'forms_count': row['forms'],
+                'severity_stats': {severity: row[severity.lower()] for severity in reversed(SEVERITIES)},
                 'report_dir': folder_path
             }
             return jsonify(reconstructed_scan)
         except Exception as e:
             return jsonify({'error': f"Erreur lecture archive: {str(e)}"}), 500
 
+    # 3. Scan interrompu avec point de reprise
+    state = load_checkpoint(folder_path)
+    if state is not None:
+        total, findings = checkpoint_findings(folder_path, state)
+        crawled_urls, forms = checkpoint_sizes(state)
+        return jsonify({
+            'scan_id': scan_id,
+            'url': state.get('target'),
+            'status': 'interrupted',
+            'progress': 0,
+            'resumable': not state.get('completed'),
+            'started_at': state.get('meta', {}).get('started_at'),
+            'updated_at': state.get('updated_at'),
+            'total_vulnerabilities': total,
+            'vulnerabilities': findings,
+            'findings_next_offset': len(findings) if len(findings) < total else None,
+            'crawled_urls_count': crawled_urls,
+            'forms_count': forms,
+            'report_dir': folder_path
+        })
+
     return jsonify({'error': 'Scan introuvable'}), 404
 
+@app.route('/api/scan/<scan_id>/findings', methods=['GET'])
+def get_scan_findings(scan_id):
+    """Page de vulnérabilités d'un scan : ?severity=, ?offset=, ?limit=."""
+    args = request.args
+    try:
+        offset = max(0, int(args.get('offset', 0)))
+        limit = max(1, min(int(args.get('limit', FINDINGS_PAGE_SIZE)), FINDINGS_MAX_PAGE_SIZE))
+    except ValueError:
+        return jsonify({'error': 'Offset ou limite invalide'}), 400
+    severity = args.get('severity', '').upper() or None
+    if severity and severity not in SEVERITIES:
+        return jsonify({'error': 'Sévérité inconnue'}), 400
+
+    folder_path = get_directory_for_scan(scan_id)
+    if scan_id in active_scans and not has_findings(folder_path):
+        # Scan pas encore démarré : liste en mémoire
+        vulnerabilities = list(active_scans[scan_id].get('vulnerabilities', []))
+        if severity:
+            vulnerabilities = [v for v in vulnerabilities if severity_of(v) == severity]
+        total = len(vulnerabilities)
+        findings = vulnerabilities[offset:offset + limit]
+    else:
+        # Scan en cours (fichier écrit au fil du scan) ou archivé
+        try:
+            if not ensure_findings(folder_path):
+                return jsonify({'error': 'Scan introuvable'}), 404
+            total = count_findings(folder_path, severity)
+            findings = read_findings(folder_path, severity, offset, limit)
+        except Exception as e:
+            return jsonify({'error': f"Erreur lecture archive: {str(e)}"}), 500
+
+    return jsonify({
+        'scan_id': scan_id,
+        'severity': severity,
+        'offset': offset,
+        'limit': limit,
+        'total': total,
+        'findings': findings,
+        'next_offset': offset + len(findings) if offset + len(findings) < total else None
+    })
+
 @app.route('/api/history', methods=['GET'])
 def get_history():
+    """Page de l'historique (du plus récent au plus ancien) : ?limit=, ?cursor=
+    (next_cursor de la page précédente) et filtres ?host=, ?from=, ?to=
+    (dates ISO), ?min_severity= et ?status=."""
+    args = request.args
+    try:
+        limit = max(1, min(int(args.get('limit', HISTORY_PAGE_SIZE)), HISTORY_MAX_PAGE_SIZE))
+    except ValueError:
+        return jsonify({'error': 'Limite invalide'}), 400
+    min_severity = args.get('min_severity', '').upper() or None
+    if min_severity and min_severity not in SEVERITIES:
+        return jsonify({'error': 'Sévérité inconnue'}), 400
+    try:
+        rows, next_cursor = HISTORY.page(
+            limit,
+            cursor=args.get('cursor') or None,
+            host=args.get('host', '').strip().lower() or None,
+            date_from=args.get('from') or None,
+            date_to=args.get('to') or None,
+            min_severity=min_severity,
+            status=args.get('status') or None
+        )
+    except ValueError:
+        return jsonify({'error': 'Curseur ou date invalide'}), 400
     try:
-        history = load_history_from_disk()
-        return jsonify({'scans': history, 'total': len(history)})
+        return jsonify({'scans': [history_item(row) for row in rows], 'next_cursor': next_cursor, 'limit': limit})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/history/<scan_id>', methods=['DELETE'])
 def delete_scan(scan_id):
-    if scan_id in active_scans:
+    was_active = scan_id in active_scans
+    if was_active:
+        # Un scan en cours est annulé : son thread libère workers et créneau
+        cancel_active_scan(scan_id)
         del active_scans[scan_id]
+        if scan_id in scan_events:
+            scan_events.pop(scan_id).close_file()
+    HISTORY.delete(scan_id)
         
     folder_path = get_directory_for_scan(scan_id)
     if os.path.exists(folder_path):
@@ -263,18 +812,29 @@ def delete_scan(scan_id):
             return jsonify({'status': 'success'})
         except Exception as e:
             return jsonify({'error': str(e)}), 500
+    if was_active:
+        return jsonify({'status': 'success'})
     
     return jsonify({'error': 'Scan introuvable'}), 404
 
 @app.route('/api/history', methods=['DELETE'])
 def reset_history():
     global active_scans
+    for scan_id in list(active_scans):
+        cancel_active_scan(scan_id)
     active_scans = {} 
+    for events in scan_events.values():
+        events.close_file()
+    scan_events.clear()
+    HISTORY.clear()
     
     try:
         if os.path.exists(SCANS_DIR):
             for filename in os.listdir(SCANS_DIR):
                 file_path = os.path.join(SCANS_DIR, filename)
+                # L'index de l'historique est vidé, pas supprimé (connexion ouverte)
+                if file_path.startswith(HISTORY_DB):
+                    continue
                 try:
                     if os.path.isfile(file_path) or os.path.islink(file_path):
                         os.unlink(file_path)
@@ -282,6 +842,7 @@ def reset_history():
                         shutil.rmtree(file_path)
                 except Exception as e:
                     print(f'Erreur suppression {file_path}: {e}')
+        RECON_CACHE.invalidate()
                     
         return jsonify({'status': 'success'})
     except Exception as e:
@@ -307,19 +868,26 @@ def download_report(scan_id, fmt):
 def get_stats():
     # C'EST ICI QUE L'ERREUR SE PRODUISAIT
     try:
-        history = load_history_from_disk()
-        total_scans = len(history)
-        total_vulns = sum(h['vulnerabilities'] for h in history)
+        # Agrégats tenus à jour par l'index : pas de relecture des rapports
+        stats = HISTORY.stats()
+        total_scans = stats['scans']
+        total_vulns = stats['vulnerabilities']
         avg = round(total_vulns / total_scans, 1) if total_scans > 0 else 0
         
-        # Maintenant active_scans est bien défini globalement
-        running_scans = len([s for s in active_scans.values() if s.get('status') == 'running'])
+        # Scans dont le thread tourne (les scans en file n'en ont pas encore)
+        running_scans = len(scan_threads)
         
         return jsonify({
             'total_scans': total_scans,
             'total_vulnerabilities': total_vulns,
             'average_vulnerabilities_per_scan': avg,
-            'active_scans': running_scans
+            'active_scans': running_scans,
+            'severity_totals': stats['severities'],
+            'top_targets': stats['top_targets'],
+            'scan_duration': stats['duration'],
+            'transport': TRANSPORT.stats(),
+            'recon_cache': RECON_CACHE.summary(),
+            'scheduler': SCHEDULER.stats()
         })
     except Exception as e:
         print(f"Erreur stats: {e}")
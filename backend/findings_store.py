@@ -0,0 +1,317 @@
+import gzip
+import itertools
+import json
+import os
+import struct
+import threading
+import zlib
+
+from history_store import SEVERITIES
+
+FINDINGS_FILE = "findings.jsonl"
+URLS_FILE = "urls.jsonl"
+FORMS_FILE = "forms.jsonl"
+FINGERPRINTS_FILE = "fingerprints.jsonl"
+STREAM_FILES = (FINDINGS_FILE, URLS_FILE, FORMS_FILE, FINGERPRINTS_FILE)
+INDEX_FILE = "findings.idx"
+# Une entrée d'index : position (octets) d'une ligne de findings.jsonl
+ENTRY = struct.Struct('<Q')
+
+
+def severity_of(vuln):
+    severity = str(vuln.get('severity', 'LOW')).upper()
+    return severity if severity in SEVERITIES else 'LOW'
+
+
+def index_path(folder, severity=None):
+    """Index de toutes les vulnérabilités, ou de celles d'une sévérité."""
+    if severity is None:
+        return os.path.join(folder, INDEX_FILE)
+    return os.path.join(folder, f"findings.{severity}.idx")
+
+
+def stream_path(folder, name):
+    """Chemin d'un fichier JSON Lines, compressé (.gz) ou non."""
+    path = os.path.join(folder, name)
+    return path + '.gz' if os.path.exists(path + '.gz') else path
+
+
+class JsonLinesWriter:
+    """
+    Fichier JSON Lines ouvert en ajout. Compressé, chaque enregistrement est
+    un membre gzip autonome : le fichier reste lisible par gzip/zcat, un
+    arrêt brutal ne perd que la dernière ligne et une position d'index
+    désigne un membre qui se décompresse seul.
+    """
+
+    def __init__(self, path, compress=False):
+        self.path = path + '.gz' if compress else path
+        self.compress = compress
+        self.file = None
+
+    def append(self, record):
+        """Ajoute un enregistrement ; retourne sa position dans le fichier."""
+        if self.file is None:
+            self.file = open(self.path, 'ab')
+        data = json.dumps(record, ensure_ascii=False).encode('utf-8') + b'\n'
+        if self.compress:
+            data = gzip.compress(data)
+        position = self.file.tell()
+        self.file.write(data)
+        self.file.flush()
+        return position
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class FindingsWriter:
+    """
+    Vulnérabilités d'un scan en JSON Lines (une par ligne, dans l'ordre de
+    découverte) et index des positions de chaque ligne : un fichier pour
+    toutes, un par sévérité. Une page se lit en allant directement à
+    l'entrée offset de l'index puis aux lignes désignées. L'index n'est
+    complété qu'après l'écriture de la ligne : un lecteur concurrent ne voit
+    que des lignes entières.
+    """
+
+    def __init__(self, folder, compress=False):
+        self.folder = folder
+        self.lock = threading.Lock()
+        self.data = JsonLinesWriter(os.path.join(folder, FINDINGS_FILE), compress)
+        self.indexes = {}
+
+    def index(self, severity=None):
+        if severity not in self.indexes:
+            self.indexes[severity] = open(index_path(self.folder, severity), 'ab')
+        return self.indexes[severity]
+
+    def append(self, vuln):
+        with self.lock:
+            entry = ENTRY.pack(self.data.append(vuln))
+            for severity in (None, severity_of(vuln)):
+                index = self.index(severity)
+                index.write(entry)
+                index.flush()
+
+    def close(self):
+        with self.lock:
+            self.data.close()
+            for index in self.indexes.values():
+                index.close()
+            self.indexes = {}
+
+
+class ResultStreams:
+    """
+    Résultats d'un scan écrits au fil de l'eau dans son dossier :
+    vulnérabilités (findings.jsonl + index), pages explorées (urls.jsonl),
+    formulaires (forms.jsonl) et empreintes des pages (fingerprints.jsonl),
+    avec compression gzip optionnelle. Lisibles pendant le scan et après un
+    arrêt brutal ; le rapport final est assemblé à partir de ces fichiers et
+    le point de reprise n'en garde que le nombre d'enregistrements (counts).
+    """
+
+    def __init__(self, folder, compress=False):
+        self.folder = folder
+        self.compress = compress
+        self.lock = threading.Lock()
+        self.open()
+
+    def open(self):
+        self.findings = FindingsWriter(self.folder, self.compress)
+        self.urls = JsonLinesWriter(os.path.join(self.folder, URLS_FILE), self.compress)
+        self.forms = JsonLinesWriter(os.path.join(self.folder, FORMS_FILE), self.compress)
+        self.fingerprints = JsonLinesWriter(os.path.join(self.folder, FINGERPRINTS_FILE), self.compress)
+        self.counts = dict.fromkeys(STREAM_FILES, 0)
+
+    def reset(self, findings=(), urls=(), forms=()):
+        """Repart d'un état connu (nouveau scan) : les fichiers sont réécrits."""
+        self.close()
+        clear_streams(self.folder)
+        self.open()
+        self.findings.index()  # index présent même sans vulnérabilité
+        for vuln in findings:
+            self.add_finding(vuln)
+        for url in urls:
+            self.add_url(url)
+        for form_url in forms:
+            self.add_form(form_url)
+
+    def resume(self, counts):
+        """
+        Reprise : chaque fichier est ramené au nombre d'enregistrements noté
+        dans le point de reprise (les lignes écrites après seront retrouvées
+        par la reprise), en le recopiant en flux.
+        """
+        self.close()
+        # Index supprimés d'abord : un lecteur concurrent ne voit pas de positions sans données
+        clear_indexes(self.folder)
+        previous = {}
+        for name in STREAM_FILES:
+            path = stream_path(self.folder, name)
+            if os.path.exists(path):
+                previous[name] = os.path.join(self.folder, 'resume.' + os.path.basename(path))
+                os.replace(path, previous[name])
+        self.reset()
+        add = {
+            FINDINGS_FILE: self.add_finding,
+            URLS_FILE: self.add_url,
+            FORMS_FILE: self.add_form,
+            FINGERPRINTS_FILE: lambda record: self.add_fingerprint(*record)
+        }
+        for name, path in previous.items():
+            for record in itertools.islice(iter_jsonl(path), counts.get(name, 0)):
+                add[name](record)
+            os.remove(path)
+
+    def add_finding(self, vuln):
+        self.findings.append(vuln)
+        with self.lock:
+            self.counts[FINDINGS_FILE] += 1
+
+    def add_url(self, url):
+        with self.lock:
+            self.urls.append(url)
+            self.counts[URLS_FILE] += 1
+
+    def add_form(self, form_url):
+        with self.lock:
+            self.forms.append(form_url)
+            self.counts[FORMS_FILE] += 1
+
+    def add_fingerprint(self, url, fingerprint):
+        with self.lock:
+            self.fingerprints.append([url, fingerprint])
+            self.counts[FINGERPRINTS_FILE] += 1
+
+    def close(self):
+        self.findings.close()
+        with self.lock:
+            self.urls.close()
+            self.forms.close()
+            self.fingerprints.close()
+
+
+def remove_files(folder, names):
+    for name in names:
+        for path in (os.path.join(folder, name), os.path.join(folder, name) + '.gz'):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def clear_indexes(folder):
+    remove_files(folder, [INDEX_FILE] + [f"findings.{severity}.idx" for severity in SEVERITIES])
+
+
+def clear_findings(folder):
+    clear_indexes(folder)
+    remove_files(folder, [FINDINGS_FILE])
+
+
+def clear_streams(folder):
+    clear_findings(folder)
+    remove_files(folder, [URLS_FILE, FORMS_FILE, FINGERPRINTS_FILE])
+
+
+def write_findings(folder, vulnerabilities):
+    """Réécrit le fichier de vulnérabilités et ses index."""
+    clear_findings(folder)
+    writer = FindingsWriter(folder)
+    try:
+        writer.index()  # index présent même sans vulnérabilité
+        for vuln in vulnerabilities:
+            writer.append(vuln)
+    finally:
+        writer.close()
+
+
+def iter_jsonl(path):
+    """Enregistrements d'un fichier JSON Lines (gzip ou non), lus en flux.
+    Une dernière ligne incomplète (scan en cours ou arrêt brutal) est ignorée."""
+    if not os.path.exists(path):
+        return
+    opener = gzip.open if path.endswith('.gz') else open
+    try:
+        with opener(path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    return
+                yield json.loads(line)
+    except (EOFError, zlib.error, gzip.BadGzipFile):
+        return
+
+
+def read_line(f, position, compressed):
+    f.seek(position)
+    if not compressed:
+        return f.readline()
+    decompressor = zlib.decompressobj(wbits=31)
+    line = b''
+    while not line.endswith(b'\n') and not decompressor.eof:
+        chunk = f.read(65536)
+        if not chunk:
+            break
+        line += decompressor.decompress(chunk)
+    return line
+
+
+def has_findings(folder):
+    return os.path.exists(index_path(folder))
+
+
+def count_findings(folder, severity=None):
+    path = index_path(folder, severity)
+    return os.path.getsize(path) // ENTRY.size if os.path.exists(path) else 0
+
+
+def severity_stats(folder):
+    """Nombre de vulnérabilités par sévérité, lu dans la taille des index."""
+    return {severity: count_findings(folder, severity) for severity in reversed(SEVERITIES)}
+
+
+def read_findings(folder, severity=None, offset=0, limit=50):
+    """Page de vulnérabilités (filtrée par sévérité) sans lire le reste du fichier."""
+    path = index_path(folder, severity)
+    if not os.path.exists(path):
+        return []
+    with open(path, 'rb') as f:
+        f.seek(offset * ENTRY.size)
+        raw = f.read(limit * ENTRY.size)
+    positions = [entry[0] for entry in ENTRY.iter_unpack(raw[:len(raw) - len(raw) % ENTRY.size])]
+    if not positions:
+        return []
+    data_path = stream_path(folder, FINDINGS_FILE)
+    findings = []
+    with open(data_path, 'rb') as f:
+        for position in positions:
+            findings.append(json.loads(read_line(f, position, data_path.endswith('.gz'))))
+    return findings
+
+
+def write_report(json_file, report, streamed):
+    """
+    Écrit le rapport JSON (même présentation que json.dump(indent=2)) en
+    recopiant les listes de streamed (clé -> itérable) une entrée à la fois,
+    sans construire la liste complète en mémoire.
+    """
+    tmp_file = json_file + '.tmp'
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        f.write('{')
+        for position, (key, value) in enumerate(report.items()):
+            f.write(',' if position else '')
+            f.write(f'\n  {json.dumps(key)}: ')
+            if key in streamed:
+                empty = True
+                f.write('[')
+                for record in streamed[key]:
+                    f.write('\n    ' if empty else ',\n    ')
+                    f.write(json.dumps(record, indent=2, ensure_ascii=False).replace('\n', '\n    '))
+                    empty = False
+                f.write(']' if empty else '\n  ]')
+            else:
+                f.write(json.dumps(value, indent=2, ensure_ascii=False).replace('\n', '\n  '))
+        f.write('\n}' if report else '}')
+    os.replace(tmp_file, json_file)
@@ -0,0 +1,390 @@
+import json
+import math
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+from port_scanner import target_host
+from scan_checkpoint import load_checkpoint
+
+REPORT_FILE = "rapport_scan_v2.json"
+SEVERITIES = ('LOW', 'MEDIUM', 'HIGH', 'CRITICAL')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scans (
+    scan_id TEXT PRIMARY KEY,
+    target TEXT,
+    host TEXT,
+    status TEXT,
+    started_at TEXT,
+    completed_at TEXT,
+    completed_ts REAL,
+    duration REAL,
+    total_vulnerabilities INTEGER,
+    critical INTEGER,
+    high INTEGER,
+    medium INTEGER,
+    low INTEGER,
+    max_severity INTEGER,
+    crawled_urls INTEGER,
+    forms INTEGER,
+    report_dir TEXT
+);
+CREATE INDEX IF NOT EXISTS scans_by_date ON scans (completed_ts DESC, scan_id DESC);
+CREATE INDEX IF NOT EXISTS scans_by_target ON scans (target, completed_ts DESC);
+CREATE INDEX IF NOT EXISTS scans_by_host ON scans (host, completed_ts DESC, scan_id DESC);
+CREATE INDEX IF NOT EXISTS scans_by_status ON scans (status, completed_ts DESC, scan_id DESC);
+
+CREATE TABLE IF NOT EXISTS stats (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    scans INTEGER,
+    vulnerabilities INTEGER,
+    critical INTEGER,
+    high INTEGER,
+    medium INTEGER,
+    low INTEGER,
+    duration_count INTEGER,
+    duration_total REAL
+);
+CREATE TABLE IF NOT EXISTS target_stats (
+    target TEXT PRIMARY KEY,
+    scans INTEGER,
+    vulnerabilities INTEGER
+);
+CREATE INDEX IF NOT EXISTS target_stats_by_scans ON target_stats (scans DESC);
+CREATE TABLE IF NOT EXISTS duration_buckets (
+    bucket INTEGER PRIMARY KEY,
+    count INTEGER
+);
+"""
+
+# Histogramme des durées de scan : classes logarithmiques de 25 %
+DURATION_RATIO = 1.25
+DURATION_BUCKETS = 64
+TOP_TARGETS = 10
+
+COLUMNS = ('scan_id', 'target', 'host', 'status', 'started_at', 'completed_at', 'completed_ts', 'duration',
+           'total_vulnerabilities', 'critical', 'high', 'medium', 'low', 'max_severity',
+           'crawled_urls', 'forms', 'report_dir')
+
+
+def encode_cursor(row):
+    """Curseur de pagination : position (date de fin, id) du dernier scan d'une page."""
+    return f"{row['completed_ts']!r}:{row['scan_id']}"
+
+
+def decode_cursor(cursor):
+    completed_ts, scan_id = cursor.split(':', 1)
+    return float(completed_ts), scan_id
+
+
+def day_bounds(value, end=False):
+    """Timestamp d'une date ISO ; une date seule (AAAA-MM-JJ) couvre toute la journée."""
+    dt = datetime.fromisoformat(value)
+    if end and len(value) == 10:
+        dt += timedelta(days=1)
+    return dt.timestamp()
+
+
+def duration_bucket(seconds):
+    """Classe d'une durée : la classe b couvre [1.25^(b-1), 1.25^b[ secondes."""
+    if seconds <= 1:
+        return 0
+    return min(int(math.log(seconds, DURATION_RATIO)) + 1, DURATION_BUCKETS - 1)
+
+
+def percentile(buckets, total, fraction):
+    """Borne haute de la classe qui contient le percentile (précision de 25 %)."""
+    rank = fraction * total
+    seen = 0
+    for bucket, count in buckets:
+        seen += count
+        if seen >= rank:
+            return round(DURATION_RATIO ** bucket, 1)
+    return None
+
+
+def severity_counts(vulnerabilities):
+    counts = {'CRITICAL': 0, 'HIGH': 0, 'MEDIUM': 0, 'LOW': 0}
+    for vuln in vulnerabilities:
+        severity = str(vuln.get('severity', 'LOW')).upper()
+        counts[severity if severity in counts else 'LOW'] += 1
+    return counts
+
+
+def timestamp(iso_date):
+    try:
+        return datetime.fromisoformat(iso_date).timestamp()
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def scan_summary(scan_id, target, status, completed_at, counts, duration=None,
+                 crawled_urls=0, forms=0, report_dir=None, started_at=None):
+    """Ligne de l'index pour un scan, à partir du nombre de vulnérabilités par sévérité."""
+    present = [rank for rank, severity in enumerate(SEVERITIES, 1) if counts[severity]]
+    return {
+        'scan_id': scan_id,
+        'target': target,
+        'host': target_host(target) if target else '',
+        'status': status,
+        'started_at': started_at,
+        'completed_at': completed_at,
+        'completed_ts': timestamp(completed_at),
+        'duration': duration,
+        'total_vulnerabilities': sum(counts.values()),
+        'critical': counts['CRITICAL'],
+        'high': counts['HIGH'],
+        'medium': counts['MEDIUM'],
+        'low': counts['LOW'],
+        'max_severity': max(present) if present else 0,
+        'crawled_urls': crawled_urls,
+        'forms': forms,
+        'report_dir': report_dir
+    }
+
+
+def summary_from_report(scan_id, report, report_dir):
+    return scan_summary(scan_id, report.get('target'), 'completed', report.get('scan_date'),
+                        severity_counts(report.get('vulnerabilities', [])),
+                        duration=report.get('scan_duration_seconds'),
+                        crawled_urls=len(report.get('crawled_urls', [])),
+                        forms=len(report.get('forms_found', [])),
+                        report_dir=report_dir)
+
+
+def checkpoint_counts(state):
+    """Vulnérabilités par sévérité d'un point de reprise (comptées, ou
+    recopiées dans les points de reprise de version 1)."""
+    return state.get('severity_counts') or severity_counts(state.get('findings', []))
+
+
+def checkpoint_sizes(state):
+    """Pages explorées et formulaires d'un point de reprise : lignes de
+    urls.jsonl et forms.jsonl, ou listes des points de reprise de version 1."""
+    streams = state.get('streams')
+    if streams is None:
+        return len(state.get('visited', [])), len(state.get('forms', []))
+    return streams.get('urls.jsonl', 0), streams.get('forms.jsonl', 0)
+
+
+def summary_from_checkpoint(scan_id, state, folder, status='interrupted'):
+    crawled_urls, forms = checkpoint_sizes(state)
+    return scan_summary(scan_id, state.get('target'), status, state.get('updated_at'),
+                        checkpoint_counts(state),
+                        duration=state.get('elapsed'),
+                        crawled_urls=crawled_urls,
+                        forms=forms,
+                        report_dir=folder,
+                        started_at=state.get('meta', {}).get('started_at'))
+
+
+class HistoryStore:
+    """
+    Index SQLite des scans archivés (un résumé par scan : cible, statut,
+    date de fin, durée, nombre de vulnérabilités par sévérité). Rempli à la
+    fin de chaque scan ; au démarrage, seuls les dossiers de scans/ absents
+    de l'index sont lus (tous au premier démarrage). Les agrégats de
+    /api/stats (totaux par sévérité, scans par cible, histogramme des
+    durées) sont mis à jour dans la même transaction.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        with self.lock, self.db:
+            self.db.executescript(SCHEMA)
+            # Index créé avant les agrégats : calcul complet, une seule fois
+            if self.db.execute("SELECT 1 FROM stats").fetchone() is None:
+                self.rebuild_stats()
+
+    def rebuild_stats(self):
+        """Recalcule les agrégats à partir de la table scans."""
+        self.db.execute("DELETE FROM stats")
+        self.db.execute("DELETE FROM target_stats")
+        self.db.execute("DELETE FROM duration_buckets")
+        self.db.execute("INSERT INTO stats VALUES (0, 0, 0, 0, 0, 0, 0, 0, 0)")
+        for row in self.db.execute("SELECT * FROM scans WHERE status = 'completed'").fetchall():
+            self.apply_stats(dict(row), 1)
+
+    def apply_stats(self, row, sign):
+        """Ajoute (sign=1) ou retire (sign=-1) un scan terminé des agrégats.
+        Appelé dans la transaction qui modifie la table scans."""
+        if row is None or row['status'] != 'completed':
+            return
+        self.db.execute(
+            "UPDATE stats SET scans = scans + ?, vulnerabilities = vulnerabilities + ?, critical = critical + ?, "
+            "high = high + ?, medium = medium + ?, low = low + ? WHERE id = 0",
+            [sign] + [sign * (row[column] or 0) for column in
+                      ('total_vulnerabilities', 'critical', 'high', 'medium', 'low')])
+
+        target = row['target'] or ''
+        self.db.execute("INSERT OR IGNORE INTO target_stats VALUES (?, 0, 0)", (target,))
+        self.db.execute("UPDATE target_stats SET scans = scans + ?, vulnerabilities = vulnerabilities + ? "
+                        "WHERE target = ?", (sign, sign * (row['total_vulnerabilities'] or 0), target))
+        self.db.execute("DELETE FROM target_stats WHERE target = ? AND scans <= 0", (target,))
+
+        if row['duration'] is not None:
+            self.db.execute("UPDATE stats SET duration_count = duration_count + ?, "
+                            "duration_total = duration_total + ? WHERE id = 0", (sign, sign * row['duration']))
+            bucket = duration_bucket(row['duration'])
+            self.db.execute("INSERT OR IGNORE INTO duration_buckets VALUES (?, 0)", (bucket,))
+            self.db.execute("UPDATE duration_buckets SET count = count + ? WHERE bucket = ?", (sign, bucket))
+
+    def row(self, scan_id):
+        row = self.db.execute("SELECT * FROM scans WHERE scan_id = ?", (scan_id,)).fetchone()
+        return dict(row) if row else None
+
+    def get(self, scan_id):
+        with self.lock:
+            return self.row(scan_id)
+
+    def record(self, summary):
+        placeholders = ', '.join('?' for _ in COLUMNS)
+        with self.lock, self.db:
+            self.apply_stats(self.row(summary['scan_id']), -1)
+            self.db.execute(f"INSERT OR REPLACE INTO scans ({', '.join(COLUMNS)}) VALUES ({placeholders})",
+                            [summary.get(column) for column in COLUMNS])
+            self.apply_stats(summary, 1)
+
+    def delete(self, scan_id):
+        with self.lock, self.db:
+            self.apply_stats(self.row(scan_id), -1)
+            self.db.execute("DELETE FROM scans WHERE scan_id = ?", (scan_id,))
+
+    def clear(self):
+        with self.lock, self.db:
+            self.db.execute("DELETE FROM scans")
+            self.rebuild_stats()
+
+    def known_ids(self):
+        with self.lock:
+            return {row[0] for row in self.db.execute("SELECT scan_id FROM scans")}
+
+    def sync(self, scans_dir, skip=()):
+        """Indexe les dossiers de scans absents de l'index et oublie ceux qui
+        ont disparu. Retourne le nombre de scans ajoutés."""
+        if not os.path.isdir(scans_dir):
+            return 0
+        folders = {name for name in os.listdir(scans_dir) if os.path.isdir(os.path.join(scans_dir, name))}
+        known = self.known_ids()
+        for scan_id in known - folders:
+            self.delete(scan_id)
+        added = 0
+        for scan_id in sorted(folders - known - set(skip)):
+            summary = self.read_folder(scan_id, os.path.join(scans_dir, scan_id))
+            if summary is not None:
+                self.record(summary)
+                added += 1
+        return added
+
+    def read_folder(self, scan_id, folder):
+        """Résumé d'un dossier de scan : rapport final, sinon point de reprise."""
+        json_path = os.path.join(folder, REPORT_FILE)
+        if os.path.exists(json_path):
+            try:
+                with open(json_path, 'r', encoding='utf-8') as f:
+                    return summary_from_report(scan_id, json.load(f), folder)
+            except Exception as e:
+                print(f"[WARN] Erreur lecture historique {scan_id}: {e}")
+                return None
+        state = load_checkpoint(folder)
+        if state is None or state.get('completed'):
+            return None
+        return summary_from_checkpoint(scan_id, state, folder)
+
+    def page(self, limit=20, cursor=None, host=None, date_from=None, date_to=None,
+             min_severity=None, status=None):
+        """
+        Page de l'historique en pagination par clé : les scans qui suivent le
+        curseur (date de fin, id) dans l'ordre décroissant, filtrés par hôte,
+        intervalle de dates, sévérité minimale et statut. Retourne
+        (lignes, curseur de la page suivante ou None).
+        """
+        clauses, params = [], []
+        if cursor:
+            completed_ts, scan_id = decode_cursor(cursor)
+            clauses.append("(completed_ts < ? OR (completed_ts = ? AND scan_id < ?))")
+            params += [completed_ts, completed_ts, scan_id]
+        if host:
+            clauses.append("host = ?")
+            params.append(host)
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        if date_from:
+            clauses.append("completed_ts >= ?")
+            params.append(day_bounds(date_from))
+        if date_to:
+            clauses.append("completed_ts < ?")
+            params.append(day_bounds(date_to, end=True))
+        if min_severity:
+            clauses.append("max_severity >= ?")
+            params.append(SEVERITIES.index(min_severity) + 1)
+
+        query = "SELECT * FROM scans"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY completed_ts DESC, scan_id DESC LIMIT ?"
+        params.append(limit + 1)
+        with self.lock:
+            rows = [dict(row) for row in self.db.execute(query, params)]
+        next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+        return rows[:limit], next_cursor
+
+    def scans_for_target(self, target, exclude=None):
+        """Scans terminés d'une cible, du plus récent au plus ancien."""
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT scan_id FROM scans WHERE target = ? AND status = 'completed' "
+                "ORDER BY completed_ts DESC", (target,))
+            return [row['scan_id'] for row in rows if row['scan_id'] != exclude]
+
+    def stats(self):
+        """Agrégats des scans terminés, tenus à jour à chaque enregistrement ou
+        suppression : la lecture ne dépend pas du nombre de scans."""
+        with self.lock:
+            totals = dict(self.db.execute("SELECT * FROM stats WHERE id = 0").fetchone())
+            targets = self.db.execute("SELECT * FROM target_stats ORDER BY scans DESC LIMIT ?",
+                                      (TOP_TARGETS,)).fetchall()
+            buckets = self.db.execute("SELECT bucket, count FROM duration_buckets "
+                                      "WHERE count > 0 ORDER BY bucket").fetchall()
+        count = totals['duration_count']
+        return {
+            'scans': totals['scans'],
+            'vulnerabilities': totals['vulnerabilities'],
+            'severities': {severity: totals[severity.lower()] for severity in reversed(SEVERITIES)},
+            'top_targets': [dict(row) for row in targets],
+            'duration': {
+                'count': count,
+                'average': round(totals['duration_total'] / count, 1) if count else None,
+                'p50': percentile(buckets, count, 0.5),
+                'p90': percentile(buckets, count, 0.9),
+                'p99': percentile(buckets, count, 0.99)
+            }
+        }
+
+
+def history_item(row):
+    """Format attendu par le frontend (date et heure affichables)."""
+    try:
+        dt = datetime.fromisoformat(row['completed_at'])
+        date_str = dt.strftime('%d/%m/%Y')
+        time_str = dt.strftime('%H:%M:%S')
+    except (TypeError, ValueError):
+        date_str = "Inconnu"
+        time_str = ""
+    return {
+        'id': row['scan_id'],
+        'scan_id': row['scan_id'],
+        'url': row['target'] or 'Inconnu',
+        'date': date_str,
+        'time': time_str,
+        'completed_at': row['completed_at'],
+        'vulnerabilities': row['total_vulnerabilities'],
+        'status': row['status']
+    }
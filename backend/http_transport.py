@@ -0,0 +1,242 @@
+import asyncio
+import threading
+import time
+import urllib.parse
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+# aiohttp est optionnel : sans lui, seul le transport requests est disponible
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
+
+def host_key(url):
+    parts = urllib.parse.urlsplit(url)
+    return f"{parts.scheme.lower()}://{parts.netloc.lower()}"
+
+
+class CountingAdapter(HTTPAdapter):
+    """
+    Adaptateur requests qui compte les connexions TCP/TLS réellement ouvertes
+    (y compris les reconnexions d'une connexion du pool fermée par le serveur,
+    que num_connections d'urllib3 ne voit pas).
+    """
+
+    def __init__(self, **kwargs):
+        self.opened = 0
+        self.counter_lock = threading.Lock()
+        super().__init__(**kwargs)
+
+    def count_connect(self):
+        with self.counter_lock:
+            self.opened += 1
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        adapter = self
+
+        class CountingHTTPConnection(HTTPConnection):
+            def connect(self):
+                super().connect()
+                adapter.count_connect()
+
+        class CountingHTTPSConnection(HTTPSConnection):
+            def connect(self):
+                super().connect()
+                adapter.count_connect()
+
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': type('CountingHTTPConnectionPool', (HTTPConnectionPool,), {'ConnectionCls': CountingHTTPConnection}),
+            'https': type('CountingHTTPSConnectionPool', (HTTPSConnectionPool,), {'ConnectionCls': CountingHTTPSConnection}),
+        }
+
+    def counters(self):
+        """(connexions ouvertes, requêtes envoyées) depuis la création de l'adaptateur."""
+        requests_sent = 0
+        pools = self.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is not None:
+                requests_sent += pool.num_requests
+        return self.opened, requests_sent
+
+
+def make_session(pool_size=None, pool_block=False, adapter=None):
+    """Session requests dont le pool de connexions suit la concurrence demandée
+    (ou qui monte un adaptateur existant, partagé avec d'autres sessions)."""
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    if adapter is None:
+        adapter = CountingAdapter(pool_connections=10, pool_maxsize=max(10, pool_size), pool_block=pool_block)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+class HttpTransport:
+    """
+    Transport HTTP partagé par tous les scans du processus API.
+
+    - un pool de connexions par hôte cible, conservé d'un scan à l'autre
+      (keep-alive : les scans récurrents du même hôte réutilisent les
+      connexions TCP/TLS déjà ouvertes), plafonné à per_host_limit
+      connexions (pool_block : les threads en trop attendent) ;
+    - une boucle asyncio et un connecteur aiohttp partagés pour le moteur async ;
+    - seul le pool est partagé : chaque scan a sa propre session (requests
+      ou aiohttp), donc ses propres cookies, qui ne fuient pas vers les
+      autres scans du même hôte ;
+    - des compteurs de connexions ouvertes / réutilisées par hôte ;
+    - les pools des hôtes sans scan en cours sont fermés après idle_timeout
+      secondes d'inactivité, et au-delà de max_hosts hôtes (le moins
+      récemment utilisé d'abord).
+    """
+
+    def __init__(self, per_host_limit=50, async_limit=2000, async_per_host_limit=500,
+                 max_hosts=32, idle_timeout=300):
+        self.per_host_limit = per_host_limit
+        self.async_limit = async_limit
+        self.async_per_host_limit = async_per_host_limit
+        self.max_hosts = max_hosts
+        self.idle_timeout = idle_timeout
+        # Ordre LRU : l'hôte le plus récemment utilisé en dernier
+        self.hosts = OrderedDict()
+        self.evicted = 0
+        self.lock = threading.Lock()
+
+        self.loop = None
+        self.aio_connector = None
+        self.aio_trace = None
+        self.aio_stats = {}
+
+    # --- Transport requests (moteur threads et crawler) ---
+
+    def session_for(self, target_url):
+        """Nouvelle session (cookies propres au scan) sur le pool partagé de l'hôte.
+        Le pool est dimensionné une fois pour toutes à per_host_limit : les
+        connexions sont ouvertes à la demande, un scan n'en utilise pas plus
+        que sa concurrence, et l'adaptateur n'est jamais remplacé sous un scan
+        en cours."""
+        key = host_key(target_url)
+        with self.lock:
+            entry = self.hosts.get(key)
+            if entry is None:
+                adapter = CountingAdapter(pool_connections=10, pool_maxsize=self.per_host_limit, pool_block=True)
+                entry = {'adapter': adapter, 'pool_size': self.per_host_limit, 'scans': 0, 'active': 0}
+                self.hosts[key] = entry
+            self.hosts.move_to_end(key)
+            entry['scans'] += 1
+            entry['active'] += 1
+            entry['last_used'] = time.time()
+            session = make_session(adapter=entry['adapter'])
+        self.evict()
+        return session
+
+    def release(self, target_url):
+        """Fin d'un scan de l'hôte : son pool devient évictable quand plus
+        aucun scan ne l'utilise."""
+        with self.lock:
+            entry = self.hosts.get(host_key(target_url))
+            if entry is not None:
+                entry['active'] = max(0, entry['active'] - 1)
+                entry['last_used'] = time.time()
+        self.evict()
+
+    def evict(self):
+        """Ferme les pools inactifs depuis idle_timeout secondes, puis les moins
+        récemment utilisés au-delà de max_hosts (jamais ceux d'un scan en cours)."""
+        now = time.time()
+        closed = []
+        with self.lock:
+            idle = [key for key, entry in self.hosts.items() if entry['active'] == 0]
+            for key in idle:
+                if len(self.hosts) > self.max_hosts or now - self.hosts[key]['last_used'] >= self.idle_timeout:
+                    closed.append(self.hosts.pop(key)['adapter'])
+            self.evicted += len(closed)
+        for adapter in closed:
+            adapter.close()
+
+    # --- Transport aiohttp (moteur async) ---
+
+    def start_loop(self):
+        with self.lock:
+            if self.loop is not None:
+                return self.loop
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, daemon=True, name="http-transport-loop").start()
+            asyncio.run_coroutine_threadsafe(self.create_aio_connector(), loop).result()
+            self.loop = loop
+            return loop
+
+    async def create_aio_connector(self):
+        trace = aiohttp.TraceConfig()
+
+        async def on_request_start(session, ctx, params):
+            ctx.host = host_key(str(params.url))
+
+        async def on_created(session, ctx, params):
+            self.aio_counter(getattr(ctx, 'host', '?'), 'opened')
+
+        async def on_reused(session, ctx, params):
+            self.aio_counter(getattr(ctx, 'host', '?'), 'reused')
+
+        trace.on_request_start.append(on_request_start)
+        trace.on_connection_create_end.append(on_created)
+        trace.on_connection_reuseconn.append(on_reused)
+
+        self.aio_trace = trace
+        self.aio_connector = aiohttp.TCPConnector(limit=self.async_limit, limit_per_host=self.async_per_host_limit)
+
+    def aio_counter(self, host, name):
+        stats = self.aio_stats.setdefault(host, {'opened': 0, 'reused': 0})
+        stats[name] += 1
+
+    def run(self, coro):
+        """Exécute une coroutine de scan sur la boucle partagée et attend son résultat."""
+        loop = self.start_loop()
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+    @asynccontextmanager
+    async def borrow_async_session(self):
+        # Session (et cookies) propre au scan ; le connecteur partagé n'est jamais fermé par un scan
+        session = aiohttp.ClientSession(headers=DEFAULT_HEADERS, connector=self.aio_connector,
+                                        connector_owner=False, timeout=aiohttp.ClientTimeout(total=3),
+                                        trace_configs=[self.aio_trace])
+        try:
+            yield session
+        finally:
+            await session.close()
+
+    # --- Statistiques ---
+
+    def stats(self):
+        hosts = {}
+        with self.lock:
+            entries = list(self.hosts.items())
+        for key, entry in entries:
+            opened, sent = entry['adapter'].counters()
+            hosts[key] = {
+                'pool_size': entry['pool_size'],
+                'scans': entry['scans'],
+                'active_scans': entry['active'],
+                'connections_opened': opened,
+                'connections_reused': max(0, sent - opened),
+                'requests': sent
+            }
+        for key, counters in list(self.aio_stats.items()):
+            hosts.setdefault(key, {})['async'] = dict(counters)
+        return {'per_host_limit': self.per_host_limit, 'max_hosts': self.max_hosts,
+                'evicted_hosts': self.evicted, 'hosts': hosts}
+
+    def host_stats(self, target_url):
+        return self.stats()['hosts'].get(host_key(target_url), {})
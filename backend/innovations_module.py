@@ -7,38 +7,16 @@ import ssl, socket
 from urllib.parse import urlparse
 from datetime import datetime
 
-def scan_basic_ports(target):
+from port_scanner import scan_ports, format_open_ports, target_host
+
+def scan_basic_ports(target, profile='common', ports=None, timeout=1.0):
     """
-    Scanne rapidement les ports les plus courants (HTTP, HTTPS, SSH, FTP, etc.)
+    Scanne en parallèle les ports d'un profil (common, top-20, top-100, top-1000)
+    ou d'une liste personnalisée (voir port_scanner).
     Retourne une liste de ports ouverts.
     """
-    common_ports = {
-        21: "FTP",
-        22: "SSH",
-        23: "Telnet",
-        25: "SMTP",
-        53: "DNS",
-        80: "HTTP",
-        110: "POP3",
-        143: "IMAP",
-        443: "HTTPS",
-        3306: "MySQL",
-        8080: "HTTP-ALT"
-    }
-
-    open_ports = []
-    target_clean = target.replace("https://", "").replace("http://", "").split("/")[0]
-
-    print(f"[+] Scan rapide des ports sur {target_clean}...")
-
-    for port, service in common_ports.items():
-        try:
-            with socket.create_connection((target_clean, port), timeout=3):
-                open_ports.append(f"{port} ({service})")
-        except (socket.timeout, ConnectionRefusedError, OSError):
-            continue
-
-    return open_ports
+    print(f"[+] Scan rapide des ports sur {target_host(target)}...")
+    return format_open_ports(scan_ports(target, profile, ports, timeout))
 
 
 def check_ssl_tls_configuration(target):
@@ -0,0 +1,84 @@
+import hashlib
+import json
+import os
+
+
+def body_hash(text):
+    return hashlib.sha256(text.encode('utf-8', 'replace')).hexdigest()
+
+
+def read_report(json_path):
+    if not os.path.exists(json_path):
+        return None
+    try:
+        with open(json_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"[WARN] Rapport illisible {json_path}: {e}")
+        return None
+
+
+def find_previous_report(scans_dir, target_url, exclude_dir=None, folders=None):
+    """Rapport le plus récent de la même cible contenant des empreintes de pages.
+    folders : dossiers candidats déjà triés du plus récent au plus ancien
+    (index de l'historique) ; sinon tout scans_dir est parcouru."""
+    if folders is not None:
+        for folder_path in folders:
+            data = read_report(os.path.join(folder_path, "rapport_scan_v2.json"))
+            if data and data.get('target') == target_url and data.get('page_fingerprints'):
+                return data
+        return None
+    best = None
+    if not os.path.isdir(scans_dir):
+        return None
+    for folder_name in os.listdir(scans_dir):
+        folder_path = os.path.join(scans_dir, folder_name)
+        if exclude_dir and os.path.abspath(folder_path) == os.path.abspath(exclude_dir):
+            continue
+        data = read_report(os.path.join(folder_path, "rapport_scan_v2.json"))
+        if data is None:
+            continue
+        if data.get('target') != target_url or not data.get('page_fingerprints'):
+            continue
+        if best is None or data.get('scan_date', '') > best.get('scan_date', ''):
+            best = data
+    return best
+
+
+class PageBaseline:
+    """
+    Empreintes des pages du scan précédent d'une cible (ETag, Last-Modified,
+    hash du corps, liens et formulaires) et résultats associés à chaque URL.
+    """
+
+    def __init__(self, report):
+        self.scan_date = report.get('scan_date')
+        self.pages = report.get('page_fingerprints', {})
+        self.findings = {}
+        for vuln in report.get('vulnerabilities', []):
+            self.findings.setdefault(vuln.get('url'), []).append(vuln)
+
+    def previous(self, url):
+        return self.pages.get(url)
+
+    def conditional_headers(self, url):
+        page = self.pages.get(url) or {}
+        headers = {}
+        if page.get('etag'):
+            headers['If-None-Match'] = page['etag']
+        if page.get('last_modified'):
+            headers['If-Modified-Since'] = page['last_modified']
+        return headers
+
+    def unchanged(self, url, fingerprint):
+        """Page identique au scan précédent : 304, ou corps de même hash."""
+        page = self.pages.get(url)
+        if not page or not fingerprint:
+            return False
+        if fingerprint.get('status') == 304:
+            return True
+        return fingerprint.get('hash') is not None and fingerprint['hash'] == page.get('hash')
+
+    def carried_findings(self, url, types):
+        return [dict(vuln, carried_over=True) for vuln in self.findings.get(url, [])
+                if vuln.get('type') in types]
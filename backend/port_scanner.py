@@ -0,0 +1,157 @@
+import asyncio
+import socket
+import time
+from urllib.parse import urlparse
+
+# resource n'existe pas sous Windows : la limite de descripteurs reste celle du système
+try:
+    import resource
+except ImportError:
+    resource = None
+
+SERVICES = {
+    7: "Echo", 9: "Discard", 13: "Daytime", 21: "FTP", 22: "SSH", 23: "Telnet", 25: "SMTP",
+    26: "SMTP-ALT", 37: "Time", 53: "DNS", 79: "Finger", 80: "HTTP", 81: "HTTP-ALT", 88: "Kerberos",
+    106: "POP3PW", 110: "POP3", 111: "RPC", 113: "Ident", 119: "NNTP", 135: "MSRPC",
+    139: "NetBIOS", 143: "IMAP", 144: "NeWS", 179: "BGP", 199: "SMUX", 389: "LDAP",
+    427: "SLP", 443: "HTTPS", 444: "SNPP", 445: "SMB", 465: "SMTPS", 513: "Rlogin",
+    514: "RSH", 515: "LPD", 543: "Klogin", 544: "Kshell", 548: "AFP", 554: "RTSP",
+    587: "Submission", 631: "IPP", 636: "LDAPS", 646: "LDP", 873: "Rsync", 990: "FTPS",
+    993: "IMAPS", 995: "POP3S", 1025: "NFS-or-IIS", 1433: "MSSQL", 1521: "Oracle",
+    1720: "H.323", 1723: "PPTP", 1755: "WMS", 1900: "UPnP", 2049: "NFS", 2121: "FTP-ALT",
+    3000: "HTTP-DEV", 3128: "Squid", 3306: "MySQL", 3389: "RDP", 5000: "UPnP-HTTP",
+    5060: "SIP", 5432: "PostgreSQL", 5900: "VNC", 6000: "X11", 6379: "Redis",
+    8000: "HTTP-ALT", 8008: "HTTP-ALT", 8080: "HTTP-ALT", 8081: "HTTP-ALT", 8443: "HTTPS-ALT",
+    8888: "HTTP-ALT", 9100: "JetDirect", 9200: "Elasticsearch", 10000: "Webmin",
+    11211: "Memcached", 27017: "MongoDB"
+}
+
+# Anciennes listes fixes des deux scanners : profils par défaut, pour que le
+# score de sécurité (pénalité par port ouvert) garde la même base
+BASIC = [21, 22, 25, 80, 110, 143, 443, 3306]
+COMMON = [21, 22, 23, 25, 53, 80, 110, 143, 443, 3306, 8080]
+
+# Ports les plus fréquemment ouverts (classement nmap)
+TOP_20 = [21, 22, 23, 25, 53, 80, 110, 111, 135, 139, 143, 443, 445, 993, 995,
+          1723, 3306, 3389, 5900, 8080]
+
+TOP_100 = [7, 9, 13, 21, 22, 23, 25, 26, 37, 53, 79, 80, 81, 88, 106, 110, 111, 113, 119, 135,
+           139, 143, 144, 179, 199, 389, 427, 443, 444, 445, 465, 513, 514, 515, 543, 544, 548,
+           554, 587, 631, 646, 873, 990, 993, 995, 1025, 1026, 1027, 1028, 1029, 1110, 1433, 1720,
+           1723, 1755, 1900, 2000, 2001, 2049, 2121, 2717, 3000, 3128, 3306, 3389, 3986, 4899,
+           5000, 5009, 5051, 5060, 5101, 5190, 5357, 5432, 5631, 5666, 5800, 5900, 6000, 6001,
+           6646, 7070, 8000, 8008, 8009, 8080, 8081, 8443, 8888, 9100, 9999, 10000, 32768, 49152,
+           49153, 49154, 49155, 49156, 49157]
+
+
+def build_top_1000():
+    """Top-100 complété par les ports système (1-1023) et des services courants."""
+    extra = [1521, 2375, 5432, 5672, 5984, 6379, 7001, 8086, 8161, 9000, 9090, 9200, 9300,
+             11211, 15672, 27017, 50000]
+    ports = []
+    for port in TOP_100 + extra + list(range(1, 1024)):
+        if port not in ports:
+            ports.append(port)
+    return ports[:1000]
+
+
+PORT_PROFILES = {
+    'basic': BASIC,
+    'common': COMMON,
+    'top-20': TOP_20,
+    'top-100': TOP_100,
+    'top-1000': build_top_1000(),
+}
+
+
+def service_name(port):
+    return SERVICES.get(port, "inconnu")
+
+
+def resolve_ports(profile='basic', ports=None):
+    """Liste des ports à scanner pour un profil ('custom' : liste fournie)."""
+    if profile == 'custom' or ports:
+        return sorted({int(port) for port in ports or [] if 0 < int(port) < 65536})
+    if profile not in PORT_PROFILES:
+        raise ValueError(f"Profil de ports inconnu : {profile}")
+    return list(PORT_PROFILES[profile])
+
+
+def target_host(target):
+    if "://" not in target:
+        target = "http://" + target
+    return urlparse(target).hostname or ""
+
+
+def raise_fd_limit(needed):
+    """Relève la limite de descripteurs ouverts si le scan en demande plus."""
+    if resource is None:
+        return
+    try:
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        wanted = needed + 256
+        if soft != resource.RLIM_INFINITY and soft < wanted:
+            if hard != resource.RLIM_INFINITY:
+                wanted = min(wanted, hard)
+            resource.setrlimit(resource.RLIMIT_NOFILE, (wanted, hard))
+    except (ValueError, OSError):
+        pass
+
+
+async def probe_port(address, port, timeout, semaphore):
+    async with semaphore:
+        try:
+            _, writer = await asyncio.wait_for(asyncio.open_connection(address, port), timeout)
+        except (asyncio.TimeoutError, OSError):
+            return False
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+        return True
+
+
+async def scan_ports_async(host, ports, timeout=1.0, max_parallel=1000):
+    """Toutes les connexions partent en même temps (au plus max_parallel
+    ouvertes à la fois), chacune bornée par timeout secondes."""
+    loop = asyncio.get_running_loop()
+    infos = await loop.getaddrinfo(host, None, type=socket.SOCK_STREAM)
+    address = infos[0][4][0]
+    semaphore = asyncio.Semaphore(max_parallel)
+    results = await asyncio.gather(*(probe_port(address, port, timeout, semaphore) for port in ports))
+    return [port for port, is_open in zip(ports, results) if is_open]
+
+
+def scan_ports(target, profile='basic', ports=None, timeout=1.0, max_parallel=1000, raise_errors=False):
+    """
+    Scan TCP connect non bloquant des ports d'un profil (basic, common, top-20,
+    top-100, top-1000) ou d'une liste personnalisée. Durée ~ timeout x ceil(ports / max_parallel).
+    raise_errors : un échec (résolution DNS, réseau) est levé au lieu de
+    rendre un résultat sans port ouvert.
+    """
+    host = target_host(target)
+    port_list = resolve_ports(profile, ports)
+    result = {
+        'host': host,
+        'profile': 'custom' if ports else profile,
+        'ports_scanned': len(port_list),
+        'timeout': timeout,
+        'open': [],
+        'duration': 0
+    }
+    start = time.time()
+    raise_fd_limit(min(max_parallel, len(port_list)))
+    try:
+        open_ports = asyncio.run(scan_ports_async(host, port_list, timeout, max_parallel))
+        result['open'] = [{'port': port, 'service': service_name(port)} for port in open_ports]
+    except (OSError, ValueError) as e:
+        if raise_errors:
+            raise
+        print(f"[!] Scan des ports impossible sur {host} : {e}")
+    result['duration'] = round(time.time() - start, 2)
+    return result
+
+
+def format_open_ports(result):
+    return [f"{entry['port']} ({entry['service']})" for entry in result['open']]
@@ -0,0 +1,142 @@
+import re
+import threading
+import urllib.parse
+
+FORM_RE = re.compile(r'<form([^>]*)>(.*?)(?:</form>|$)', re.IGNORECASE | re.DOTALL)
+FIELD_RE = re.compile(r'<(input|select|textarea)([^>]*)>', re.IGNORECASE)
+ATTR_RE = re.compile(r'([^\s"\'=<>/]+)(\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+)))?')
+
+# Champs jamais injectés (envoyés avec leur valeur d'origine)
+PASSIVE_TYPES = ('submit', 'button', 'reset', 'image', 'file')
+
+
+def html_attr(attrs, name):
+    """Valeur de l'attribut name. Les attributs sont lus un par un : ni
+    data-name=... ni un name=... à l'intérieur d'une valeur entre guillemets
+    ne sont pris pour l'attribut."""
+    for match in ATTR_RE.finditer(attrs):
+        if match.group(1).lower() == name:
+            if match.group(2) is None:
+                return ''
+            return next(group for group in match.groups()[2:] if group is not None)
+    return None
+
+
+def parse_forms(html):
+    """Retourne les formulaires d'une page : (action, méthode, [(nom, valeur, injectable)])."""
+    forms = []
+    for attrs, body in FORM_RE.findall(html):
+        action = html_attr(attrs, 'action') or ''
+        method = (html_attr(attrs, 'method') or 'get').lower()
+        fields = []
+        for tag, field_attrs in FIELD_RE.findall(body):
+            name = html_attr(field_attrs, 'name')
+            if not name:
+                continue
+            field_type = (html_attr(field_attrs, 'type') or '').lower()
+            value = html_attr(field_attrs, 'value') or '1'
+            fields.append((name, value, field_type not in PASSIVE_TYPES))
+        forms.append((action, 'post' if method == 'post' else 'get', fields))
+    return forms
+
+
+class ProbePlanner:
+    """
+    Planification des requêtes de test à partir des paramètres réellement
+    utilisés par la cible : paramètres des query strings crawlées et champs
+    des formulaires (en GET ou POST). Une URL sans paramètre connu ne reçoit
+    que les paramètres de repli du test (id, q, file, cmd).
+    """
+
+    def __init__(self):
+        self.forms = {}
+        self.lock = threading.Lock()
+
+    def add_form(self, url, method, fields):
+        with self.lock:
+            form = self.forms.setdefault(url, {'method': method, 'fields': []})
+            known = {name for name, _, _ in form['fields']}
+            form['fields'].extend(field for field in fields if field[0] not in known)
+
+    def snapshot(self):
+        with self.lock:
+            return {url: {'method': form['method'], 'fields': [list(field) for field in form['fields']]}
+                    for url, form in self.forms.items()}
+
+    def restore(self, forms):
+        for url, form in (forms or {}).items():
+            self.add_form(url, form['method'], [tuple(field) for field in form['fields']])
+
+    def injection_points(self, url):
+        """(méthode, url de base, paramètres query, paramètres body, noms injectables)."""
+        parts = urllib.parse.urlsplit(url)
+        base = urllib.parse.urlunsplit((parts.scheme, parts.netloc, parts.path, '', ''))
+        query = urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+        points = [('query', name) for name, _ in query]
+
+        with self.lock:
+            form = self.forms.get(url)
+            fields = list(form['fields']) if form else []
+            method = form['method'] if form else 'get'
+
+        body = []
+        known = {name for name, _ in query}
+        for name, value, injectable in fields:
+            if name in known:
+                continue
+            known.add(name)
+            if method == 'post':
+                body.append((name, value))
+                location = 'body'
+            else:
+                query.append((name, value))
+                location = 'query'
+            if injectable:
+                points.append((location, name))
+        return method, base, query, body, points
+
+    def targets(self, url, check):
+        """Points d'injection d'un test, avec repli sur ses paramètres par défaut."""
+        method, base, query, body, points = self.injection_points(url)
+        if not points:
+            method, body = 'get', []
+            points = [('query', name) for name in check['fallback_params']]
+        unique = []
+        for point in points:
+            if point not in unique:
+                unique.append(point)
+        return method, base, query, body, unique
+
+    def parameters(self, url, check):
+        return [name for _, name in self.targets(url, check)[4]]
+
+    def request_for(self, url, check, names, payload, targets=None):
+        """Requête (méthode, url_de_test, données) injectant payload dans tous
+        les paramètres de names, les autres gardant leur valeur d'origine."""
+        method, base, query, body, points = targets or self.targets(url, check)
+        pairs = [(k, payload if k in names else v) for k, v in query]
+        present = {k for k, _ in query}
+        pairs += [(name, payload) for location, name in points
+                  if location == 'query' and name in names and name not in present]
+        data = tuple((k, payload if k in names else v) for k, v in body) if body else None
+        test_url = base
+        if pairs:
+            test_url += '?' + urllib.parse.urlencode(pairs, quote_via=urllib.parse.quote)
+        return method.upper(), test_url, data
+
+    def plan(self, url, check, batch=False):
+        """
+        Liste des sondes (méthode, url_de_test, données, paramètres, payload)
+        d'un test. Par défaut un paramètre par sonde, dans l'ordre : paramètre
+        par paramètre, payload par payload. En mode batch, chaque payload est
+        injecté dans tous les paramètres à la fois (une sonde par payload).
+        """
+        targets = self.targets(url, check)
+        names = tuple(name for _, name in targets[4])
+        groups = [names] if batch and len(names) > 1 else [(name,) for name in names]
+
+        probes = []
+        for group in groups:
+            for payload in check['payloads']:
+                probes.append(self.request_for(url, check, group, payload, targets) + (group, payload))
+        return probes
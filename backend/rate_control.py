@@ -0,0 +1,307 @@
+import asyncio
+import collections
+import threading
+import time
+import urllib.parse
+from email.utils import parsedate_to_datetime
+
+# Codes HTTP signalant une surcharge de la cible
+THROTTLE_STATUSES = (429, 503)
+
+
+def parse_retry_after(value):
+    """Retry-After en secondes (entier ou date HTTP), None si illisible."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def resolve(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class AsyncWaiters:
+    """
+    Coroutines en attente d'un créneau, réveillées par la libération d'un
+    autre créneau (qui peut venir d'un thread du crawler ou d'une autre
+    boucle asyncio) plutôt qu'en interrogeant le compteur à intervalles
+    réguliers. add, discard et wake s'appellent sous le verrou du
+    propriétaire du compteur.
+    """
+
+    def __init__(self):
+        self.futures = collections.deque()
+
+    def add(self):
+        future = asyncio.get_running_loop().create_future()
+        self.futures.append(future)
+        return future
+
+    def discard(self, future):
+        try:
+            self.futures.remove(future)
+        except ValueError:
+            pass
+
+    def wake(self, count=1):
+        while self.futures and count > 0:
+            future = self.futures.popleft()
+            try:
+                future.get_loop().call_soon_threadsafe(resolve, future)
+                count -= 1
+            except RuntimeError:
+                # Boucle fermée : coroutine abandonnée
+                continue
+
+    def wake_all(self):
+        self.wake(len(self.futures))
+
+    async def wait(self, lock, future, timeout=None):
+        """Attend le réveil de future (au plus timeout s). Un réveil reçu par
+        une coroutine annulée est transmis à la suivante."""
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            with lock:
+                if future.done() and not future.cancelled():
+                    self.wake()
+            raise
+        finally:
+            with lock:
+                self.discard(future)
+
+
+class HostLimiter:
+    """
+    Contrôle AIMD de la concurrence vers un hôte : +1 requête simultanée
+    après une fenêtre de réponses saines, division par deux sur 429/503,
+    timeout, erreur réseau ou latence qui dérive au-delà de
+    latency_factor x la latence de référence (et d'au moins
+    min_latency_delta secondes). Retry-After suspend l'hôte.
+    """
+
+    def __init__(self, host, initial_limit, max_limit, min_limit=1,
+                 latency_factor=2.0, min_latency_delta=0.05, max_retry_after=60, max_events=50):
+        self.host = host
+        self.max_limit = max(min_limit, max_limit)
+        self.min_limit = min_limit
+        self.limit = float(min(self.max_limit, max(min_limit, initial_limit)))
+        self.latency_factor = latency_factor
+        self.min_latency_delta = min_latency_delta
+        self.max_retry_after = max_retry_after
+        self.max_events = max_events
+
+        self.in_flight = 0
+        self.successes = 0
+        self.latency_ewma = None
+        self.latency_baseline = None
+        self.paused_until = 0.0
+        self.last_decrease = 0.0
+
+        self.stats = {
+            'requests': 0, 'throttled': 0, 'timeouts': 0, 'errors': 0,
+            'increases': 0, 'decreases': 0, 'retry_after_pauses': 0,
+            'peak_limit': int(self.limit)
+        }
+        self.events = []
+        self.condition = threading.Condition()
+        self.waiters = AsyncWaiters()
+
+    # --- Acquisition d'un créneau ---
+
+    def wait_time(self):
+        """0 si un créneau est pris, sinon le délai maximal avant de réessayer
+        (fin de la pause Retry-After ; hôte saturé : réveil à la libération
+        d'un créneau, au plus tard dans 1 s)."""
+        with self.condition:
+            now = time.time()
+            if now < self.paused_until:
+                return self.paused_until - now
+            if self.in_flight < int(self.limit):
+                self.in_flight += 1
+                return 0
+            return 1.0
+
+    def acquire(self):
+        while True:
+            delay = self.wait_time()
+            if delay == 0:
+                return
+            with self.condition:
+                self.condition.wait(timeout=min(delay, 1.0))
+
+    async def acquire_async(self):
+        # Réveil à la libération d'un créneau, ou à la fin d'une pause Retry-After
+        while True:
+            with self.condition:
+                delay = self.wait_time()
+                if delay == 0:
+                    return
+                future = self.waiters.add()
+            await self.waiters.wait(self.condition, future, min(delay, 1.0))
+
+    # --- Décisions AIMD ---
+
+    def log(self, action, reason):
+        self.events.append({
+            'time': round(time.time(), 3),
+            'action': action,
+            'reason': reason,
+            'limit': int(self.limit)
+        })
+        if len(self.events) > self.max_events:
+            del self.events[0]
+
+    def decrease(self, now, reason):
+        # Une seule réduction par "latence" : les réponses d'une même rafale
+        # ne doivent pas diviser la limite plusieurs fois
+        window = self.latency_ewma or 1.0
+        if now - self.last_decrease < window:
+            return
+        self.last_decrease = now
+        self.successes = 0
+        self.limit = max(self.min_limit, self.limit / 2)
+        self.stats['decreases'] += 1
+        self.log('decrease', reason)
+
+    def release(self, latency, status=None, retry_after=None, error=None):
+        with self.condition:
+            now = time.time()
+            self.in_flight -= 1
+            self.stats['requests'] += 1
+
+            if error == 'timeout':
+                self.stats['timeouts'] += 1
+                self.decrease(now, 'timeout')
+            elif error:
+                self.stats['errors'] += 1
+                self.decrease(now, 'erreur reseau')
+            elif status in THROTTLE_STATUSES:
+                self.stats['throttled'] += 1
+                delay = parse_retry_after(retry_after)
+                if delay:
+                    self.paused_until = max(self.paused_until, now + min(delay, self.max_retry_after))
+                    self.stats['retry_after_pauses'] += 1
+                    self.log('pause', f"Retry-After {round(delay, 1)}s")
+                self.decrease(now, f"HTTP {status}")
+            else:
+                self.latency_ewma = latency if self.latency_ewma is None else 0.8 * self.latency_ewma + 0.2 * latency
+                if self.latency_baseline is None or self.latency_ewma < self.latency_baseline:
+                    self.latency_baseline = self.latency_ewma
+
+                drift = self.latency_ewma - self.latency_baseline
+                if self.latency_ewma > self.latency_baseline * self.latency_factor and drift > self.min_latency_delta:
+                    self.decrease(now, 'latence')
+                else:
+                    self.successes += 1
+                    if self.successes >= int(self.limit) and self.limit < self.max_limit:
+                        self.successes = 0
+                        self.limit += 1
+                        self.stats['increases'] += 1
+                        self.stats['peak_limit'] = max(self.stats['peak_limit'], int(self.limit))
+                        self.log('increase', 'reponses saines')
+
+            self.condition.notify_all()
+            self.waiters.wake_all()
+
+    def abandon(self):
+        """Créneau rendu sans réponse à juger (arrêt du scan) : ni succès ni erreur."""
+        with self.condition:
+            self.in_flight -= 1
+            self.condition.notify()
+            self.waiters.wake()
+
+    def snapshot(self):
+        with self.condition:
+            return dict(self.stats,
+                        limit=int(self.limit),
+                        latency_ms=round(self.latency_ewma * 1000, 1) if self.latency_ewma else None,
+                        baseline_ms=round(self.latency_baseline * 1000, 1) if self.latency_baseline else None,
+                        events=list(self.events))
+
+
+class Slot:
+    """Créneau de requête utilisable avec `with` (threads) ou `async with` (asyncio).
+    Les exceptions de neutral (arrêt du scan) ne sont pas un signal de congestion."""
+
+    def __init__(self, limiter, neutral=()):
+        self.limiter = limiter
+        self.neutral = neutral
+        self.status = None
+        self.retry_after = None
+        self.start = 0.0
+
+    def observe(self, status, headers=None):
+        self.status = status
+        if headers is not None:
+            self.retry_after = headers.get('Retry-After')
+
+    def finish(self, exc):
+        if self.limiter is None:
+            return
+        if isinstance(exc, self.neutral):
+            self.limiter.abandon()
+            return
+        error = None
+        if exc is not None:
+            error = 'timeout' if 'timeout' in type(exc).__name__.lower() else 'error'
+        self.limiter.release(time.time() - self.start, self.status, self.retry_after, error)
+
+    def __enter__(self):
+        if self.limiter:
+            self.limiter.acquire()
+        self.start = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.finish(exc)
+        return False
+
+    async def __aenter__(self):
+        if self.limiter:
+            await self.limiter.acquire_async()
+        self.start = time.time()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.finish(exc)
+        return False
+
+
+class RateController:
+    """Un HostLimiter par hôte cible ; inactif si enabled=False. neutral :
+    exceptions qui rendent un créneau sans compter comme erreur."""
+
+    def __init__(self, enabled=False, initial_limit=5, max_limit=50, neutral=()):
+        self.enabled = enabled
+        self.neutral = neutral
+        self.initial_limit = initial_limit
+        self.max_limit = max_limit
+        self.limiters = {}
+        self.lock = threading.Lock()
+
+    def for_url(self, url):
+        host = urllib.parse.urlsplit(url).netloc.lower()
+        with self.lock:
+            if host not in self.limiters:
+                self.limiters[host] = HostLimiter(host, self.initial_limit, self.max_limit)
+            return self.limiters[host]
+
+    def slot(self, url):
+        return Slot(self.for_url(url) if self.enabled else None, self.neutral)
+
+    def stats(self):
+        if not self.enabled:
+            return {'enabled': False}
+        with self.lock:
+            limiters = list(self.limiters.values())
+        return {'enabled': True, 'hosts': {l.host: l.snapshot() for l in limiters}}
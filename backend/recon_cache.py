@@ -0,0 +1,92 @@
+import json
+import os
+import threading
+import time
+
+# Durée de validité par type de sonde, en secondes
+DEFAULT_TTLS = {
+    'ports': 6 * 3600,
+    'tls': 24 * 3600,
+    'server': 3600,
+}
+
+
+class ReconCache:
+    """
+    Cache des résultats de reconnaissance par hôte (ports ouverts, certificat
+    TLS, en-tête Server), partagé par les scans du processus et sauvegardé
+    sur disque. Une entrée expire après le TTL de son type de sonde. La clé
+    d'hôte est scheme://hôte:port (voir http_transport.host_key).
+    """
+
+    def __init__(self, path, ttls=None):
+        self.path = path
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.entries = {}
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0}
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except Exception as e:
+            print(f"[WARN] Cache de recon illisible {self.path}: {e}")
+            self.entries = {}
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def key(self, probe, variant=None):
+        return f"{probe}:{variant}" if variant else probe
+
+    def get(self, host, probe, variant=None):
+        """Valeur en cache encore valide, sinon None."""
+        with self.lock:
+            entry = self.entries.get(host, {}).get(self.key(probe, variant))
+        if entry is None or time.time() - entry['time'] > self.ttls.get(probe, 0):
+            return None
+        return entry
+
+    def put(self, host, probe, value, variant=None):
+        with self.lock:
+            self.entries.setdefault(host, {})[self.key(probe, variant)] = {'value': value, 'time': time.time()}
+            try:
+                self.save()
+            except Exception as e:
+                print(f"[WARN] Écriture du cache de recon impossible : {e}")
+
+    def fetch(self, host, probe, compute, variant=None, force=False):
+        """(valeur, True si elle vient du cache) ; compute() est appelé si l'entrée
+        manque, a expiré ou si force est demandé. Une sonde en échec lève une
+        exception (propagée) ou retourne None : rien n'est mis en cache."""
+        entry = None if force else self.get(host, probe, variant)
+        if entry is not None:
+            with self.lock:
+                self.stats['hits'] += 1
+            return entry['value'], True
+        value = compute()
+        if value is not None:
+            self.put(host, probe, value, variant)
+        with self.lock:
+            self.stats['misses'] += 1
+        return value, False
+
+    def invalidate(self, host=None):
+        with self.lock:
+            if host is None:
+                self.entries = {}
+            else:
+                self.entries.pop(host, None)
+            self.save()
+
+    def summary(self):
+        with self.lock:
+            return dict(self.stats, hosts=len(self.entries), ttls=dict(self.ttls))
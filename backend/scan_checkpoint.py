@@ -0,0 +1,88 @@
+import json
+import os
+import threading
+import time
+
+CHECKPOINT_FILE = "checkpoint.json"
+
+
+def checkpoint_path(scan_dir):
+    return os.path.join(scan_dir, CHECKPOINT_FILE)
+
+
+def load_checkpoint(scan_dir):
+    """Dernier point de reprise d'un dossier de scan (None si absent ou illisible)."""
+    path = checkpoint_path(scan_dir)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"[WARN] Point de reprise illisible {path}: {e}")
+        return None
+
+
+class CheckpointWriter:
+    """
+    Écriture périodique de l'état d'un scan dans son dossier : au plus une
+    écriture toutes les interval secondes (sauf écriture forcée), via un
+    fichier temporaire renommé pour ne jamais laisser un JSON tronqué.
+    Les écritures périodiques passent par un thread d'arrière-plan (jamais
+    sur la boucle asyncio partagée) ; un état plus ancien n'écrase jamais
+    un état plus récent déjà écrit.
+    """
+
+    def __init__(self, scan_dir, interval=5.0):
+        self.path = checkpoint_path(scan_dir)
+        self.interval = interval
+        self.last_write = 0.0
+        self.writes = 0
+        self.lock = threading.Lock()
+        self.file_lock = threading.Lock()
+        self.sequence = 0
+        self.written = 0
+        self.pending = None
+        self.writing = False
+
+    def due(self):
+        return time.time() - self.last_write >= self.interval
+
+    def write(self, state, wait=True):
+        """Écrit state ; avec wait=False, l'écriture est confiée au thread
+        d'arrière-plan (le dernier état en attente remplace le précédent)."""
+        with self.lock:
+            self.last_write = time.time()
+            self.sequence += 1
+            sequence = self.sequence
+            if not wait:
+                self.pending = (sequence, state)
+                if not self.writing:
+                    self.writing = True
+                    threading.Thread(target=self.write_pending, daemon=True, name="checkpoint").start()
+                return
+        self.dump(sequence, state)
+
+    def write_pending(self):
+        while True:
+            with self.lock:
+                item, self.pending = self.pending, None
+                if item is None:
+                    self.writing = False
+                    return
+            try:
+                self.dump(*item)
+            except Exception as e:
+                print(f"[!] Erreur écriture point de reprise : {e}")
+
+    def dump(self, sequence, state):
+        with self.file_lock:
+            if sequence < self.written:
+                return
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            self.written = sequence
+            self.writes += 1
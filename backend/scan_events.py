@@ -0,0 +1,121 @@
+import json
+import os
+import threading
+import time
+
+EVENTS_FILE = "events.jsonl"
+
+
+class ScanEvents:
+    """
+    Journal append-only des événements d'un scan (changements de statut et
+    de phase, compteurs, URLs découvertes, nouvelles vulnérabilités), lu en
+    flux par /api/scan/<id>/events ou par lots avec ?since=. Le curseur d'un
+    lecteur est le nombre d'événements déjà reçus. Avec path, chaque
+    événement est aussi ajouté au fichier (une ligne JSON), rechargé à la
+    création : les curseurs restent valables après un redémarrage. Le
+    fichier reste ouvert en ajout jusqu'à close().
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.events = []
+        self.closed = False
+        self.file = None
+        self.condition = threading.Condition()
+        if path and os.path.exists(path):
+            self.load()
+
+    def load(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    self.events.append(json.loads(line))
+                except ValueError:
+                    # Dernière ligne tronquée par un arrêt brutal
+                    break
+
+    def publish(self, kind, data):
+        with self.condition:
+            event = {'id': len(self.events) + 1, 'type': kind, 'time': time.time(), 'data': data}
+            self.events.append(event)
+            self.write(event)
+            self.condition.notify_all()
+
+    def write(self, event):
+        # Pas de recréation du dossier d'un scan supprimé (annulation)
+        if not self.path or not os.path.isdir(os.path.dirname(self.path)):
+            return
+        try:
+            if self.file is None:
+                self.file = open(self.path, 'a', encoding='utf-8')
+            self.file.write(json.dumps(event, ensure_ascii=False) + '\n')
+            self.file.flush()
+        except OSError as e:
+            print(f"[WARN] Écriture du journal {self.path} impossible : {e}")
+
+    def cursor(self):
+        with self.condition:
+            return len(self.events)
+
+    def close(self):
+        """Fin du thread de scan : les flux ouverts se terminent après le dernier événement."""
+        with self.condition:
+            self.closed = True
+            self.close_file()
+            self.condition.notify_all()
+
+    def close_file(self):
+        """Ferme le fichier (avant la suppression du dossier du scan)."""
+        with self.condition:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+    def reopen(self):
+        with self.condition:
+            self.closed = False
+
+    def read(self, cursor):
+        """Événements après cursor, sans attendre, et nouveau curseur."""
+        with self.condition:
+            return self.events[cursor:], len(self.events)
+
+    def wait(self, cursor, timeout=15):
+        """Événements après cursor (attend au plus timeout s) et état du journal."""
+        with self.condition:
+            if len(self.events) <= cursor and not self.closed:
+                self.condition.wait(timeout)
+            return self.events[cursor:], self.closed
+
+
+def summarize(events):
+    """Changements d'un lot d'événements : vulnérabilités, URLs découvertes,
+    changements de statut et dernières valeurs des champs modifiés."""
+    delta = {'findings': [], 'urls': [], 'status_changes': [], 'changes': {}}
+    for event in events:
+        data = event['data']
+        if event['type'] == 'finding':
+            delta['findings'].append(data['vulnerability'])
+        elif event['type'] == 'url':
+            delta['urls'].append(data['url'])
+        else:
+            delta['changes'].update(data)
+            if event['type'] == 'status':
+                delta['status_changes'].append(dict(data, time=event['time']))
+    return delta
+
+
+def sse_stream(log, cursor=0, keepalive=15):
+    """Générateur text/event-stream : un message par événement, un commentaire
+    toutes les keepalive s pour garder la connexion ouverte."""
+    while True:
+        events, closed = log.wait(cursor, keepalive)
+        for event in events:
+            yield f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event['data'], ensure_ascii=False)}\n\n"
+        cursor += len(events)
+        if closed and not events:
+            yield "event: end\ndata: {}\n\n"
+            return
+        if not events:
+            yield ": keepalive\n\n"
@@ -0,0 +1,241 @@
+import heapq
+import itertools
+import threading
+import time
+
+from rate_control import AsyncWaiters
+
+PRIORITIES = {'low': 0, 'normal': 1, 'high': 2}
+
+
+class QueueFull(Exception):
+    pass
+
+
+class WorkerGate:
+    """
+    Nombre de requêtes simultanées accordé à un scan par l'ordonnanceur.
+    La limite est ajustée à chaud (rebalance) ; limit=None : pas de limite.
+    Utilisable avec `with` (threads) ou `async with` (asyncio).
+    """
+
+    def __init__(self, limit=None):
+        self.limit = limit
+        self.in_use = 0
+        self.condition = threading.Condition()
+        self.waiters = AsyncWaiters()
+
+    def resize(self, limit):
+        with self.condition:
+            self.limit = limit
+            self.condition.notify_all()
+            self.waiters.wake_all()
+
+    def try_acquire(self):
+        with self.condition:
+            if self.limit is None or self.in_use < self.limit:
+                self.in_use += 1
+                return True
+            return False
+
+    def acquire(self):
+        with self.condition:
+            while self.limit is not None and self.in_use >= self.limit:
+                self.condition.wait(timeout=1.0)
+            self.in_use += 1
+
+    async def acquire_async(self):
+        while True:
+            with self.condition:
+                if self.try_acquire():
+                    return
+                future = self.waiters.add()
+            await self.waiters.wait(self.condition, future)
+
+    def release(self):
+        with self.condition:
+            self.in_use -= 1
+            self.condition.notify()
+            self.waiters.wake()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+        return False
+
+    async def __aenter__(self):
+        await self.acquire_async()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.release()
+        return False
+
+
+class ScanScheduler:
+    """
+    File d'attente bornée des scans de l'API :
+    - au plus max_running scans actifs, les autres attendent par priorité
+      puis par ordre d'arrivée ;
+    - au plus max_queued scans en attente (QueueFull au-delà) ;
+    - un budget global de worker_budget requêtes simultanées, partagé
+      équitablement entre les scans actifs (un scan qui demande moins que
+      sa part laisse le reste aux autres) et recalculé à chaque démarrage
+      ou fin de scan ;
+    - un budget séparé de async_budget requêtes en vol pour les scans du
+      moteur async (coroutines sur la boucle partagée, pas des threads),
+      partagé de la même façon entre eux.
+
+    on_position(scan_id, position) est appelé (hors verrou) pour chaque scan
+    en attente dont le rang dans la file a changé.
+    """
+
+    def __init__(self, max_running=3, max_queued=20, worker_budget=40, async_budget=2000,
+                 on_position=None):
+        self.max_running = max_running
+        self.max_queued = max_queued
+        self.worker_budget = worker_budget
+        self.async_budget = async_budget
+        self.queue = []
+        self.jobs = {}
+        self.running = {}
+        self.counter = itertools.count()
+        self.lock = threading.Lock()
+        self.completed = 0
+        self.total_wait = 0.0
+        self.on_position = on_position
+
+    def budget(self, pool):
+        return self.async_budget if pool == 'async' else self.worker_budget
+
+    def submit(self, scan_id, workers, start, priority='normal', pool='threads'):
+        """Met un scan en file ; start(job) est appelé quand il obtient un créneau.
+        pool : budget de requêtes du scan ('threads' ou 'async')."""
+        with self.lock:
+            if len(self.queue) >= self.max_queued:
+                raise QueueFull(f"File d'attente pleine ({self.max_queued} scans)")
+            job = {
+                'scan_id': scan_id,
+                'priority': priority,
+                'pool': pool,
+                'requested_workers': workers,
+                'allocated_workers': 0,
+                'gate': WorkerGate(0),
+                'start': start,
+                'submitted_at': time.time(),
+                'started_at': None,
+                'position': None
+            }
+            self.jobs[scan_id] = job
+            heapq.heappush(self.queue, (-PRIORITIES[priority], next(self.counter), scan_id))
+        self.dispatch()
+        return job
+
+    def dispatch(self):
+        started = []
+        with self.lock:
+            while self.queue and len(self.running) < self.max_running:
+                _, _, scan_id = heapq.heappop(self.queue)
+                job = self.jobs[scan_id]
+                job['started_at'] = time.time()
+                self.total_wait += job['started_at'] - job['submitted_at']
+                self.running[scan_id] = job
+                started.append(job)
+            self.rebalance()
+        for job in started:
+            job['start'](job)
+        self.notify_positions()
+
+    def rebalance(self):
+        """Partage équitable de chaque budget (remplissage par niveau)."""
+        for pool in ('threads', 'async'):
+            jobs = sorted((job for job in self.running.values() if job['pool'] == pool),
+                          key=lambda job: job['requested_workers'])
+            remaining = self.budget(pool)
+            for index, job in enumerate(jobs):
+                share = remaining // (len(jobs) - index)
+                allocated = max(1, min(job['requested_workers'], share))
+                job['allocated_workers'] = allocated
+                job['gate'].resize(allocated)
+                remaining -= allocated
+
+    def finish(self, scan_id):
+        with self.lock:
+            job = self.running.pop(scan_id, None)
+            self.jobs.pop(scan_id, None)
+            if job is not None:
+                self.completed += 1
+        self.dispatch()
+
+    def cancel(self, scan_id):
+        """Retire un scan encore en attente ; False s'il a déjà démarré."""
+        with self.lock:
+            for index, (_, _, queued_id) in enumerate(self.queue):
+                if queued_id == scan_id:
+                    self.queue.pop(index)
+                    heapq.heapify(self.queue)
+                    self.jobs.pop(scan_id, None)
+                    break
+            else:
+                return False
+        self.notify_positions()
+        return True
+
+    def notify_positions(self):
+        """Signale aux scans en attente leur nouveau rang (départs, annulations,
+        arrivée d'un scan plus prioritaire)."""
+        if self.on_position is None:
+            return
+        changed = []
+        with self.lock:
+            for index, (_, _, scan_id) in enumerate(sorted(self.queue)):
+                job = self.jobs[scan_id]
+                if job['position'] != index + 1:
+                    job['position'] = index + 1
+                    changed.append((scan_id, index + 1))
+        for scan_id, position in changed:
+            self.on_position(scan_id, position)
+
+    def position(self, scan_id):
+        """Rang dans la file (1 = prochain à démarrer), None si le scan n'attend pas."""
+        ranked = sorted(self.queue)
+        for index, (_, _, queued_id) in enumerate(ranked):
+            if queued_id == scan_id:
+                return index + 1
+        return None
+
+    def job_status(self, scan_id):
+        with self.lock:
+            job = self.jobs.get(scan_id)
+            if job is None:
+                return {}
+            now = time.time()
+            waited = (job['started_at'] or now) - job['submitted_at']
+            return {
+                'priority': job['priority'],
+                'worker_pool': job['pool'],
+                'queue_position': self.position(scan_id),
+                'wait_seconds': round(waited, 1),
+                'requested_workers': job['requested_workers'],
+                'allocated_workers': job['allocated_workers']
+            }
+
+    def stats(self):
+        with self.lock:
+            started = self.completed + len(self.running)
+            return {
+                'max_running': self.max_running,
+                'max_queued': self.max_queued,
+                'worker_budget': self.worker_budget,
+                'async_budget': self.async_budget,
+                'running': len(self.running),
+                'queued': len(self.queue),
+                'workers_allocated': sum(job['allocated_workers'] for job in self.running.values()
+                                         if job['pool'] == 'threads'),
+                'async_allocated': sum(job['allocated_workers'] for job in self.running.values()
+                                       if job['pool'] == 'async'),
+                'average_wait_seconds': round(self.total_wait / started, 1) if started else 0
+            }
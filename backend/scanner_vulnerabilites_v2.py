@@ -1,10 +1,16 @@
+import asyncio
+import codecs
+import itertools
 import json
 import os
+import queue
 import re
+import threading
 import time
 import urllib.parse
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
 
 """from innovations_module import (
     scan_basic_ports,
@@ -25,30 +31,39 @@ except ImportError:
     subprocess.check_call([sys.executable, "-m", "pip", "install", "requests"])
     import requests
 
+from url_normalizer import canonicalize_url, TemplateIndex
+from signature_matcher import SIGNATURES
+from rate_control import RateController
+from http_transport import make_session, host_key
+from probe_planner import ProbePlanner, parse_forms
+from scan_checkpoint import CheckpointWriter, checkpoint_path
+from page_fingerprints import PageBaseline, body_hash, find_previous_report
+from port_scanner import scan_ports, format_open_ports
+from scan_scheduler import WorkerGate
+from findings_store import (ResultStreams, iter_jsonl, write_report, stream_path, severity_of,
+                            FINDINGS_FILE, URLS_FILE, FORMS_FILE, FINGERPRINTS_FILE)
+from history_store import checkpoint_counts
+
+# aiohttp est optionnel : sans lui, le moteur "async" retombe sur les threads
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
 # === Fonctions d'analyse avancée (anciennement dans innovations_module) ===
 import socket, ssl, requests
 
-def scan_basic_ports(target):
-    """Scanne quelques ports courants."""
-    ports = [21, 22, 25, 80, 110, 143, 443, 3306]
-    open_ports = []
-    try:
-        host = target.replace("http://", "").replace("https://", "").split("/")[0]
-        for port in ports:
-            s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            s.settimeout(0.5)
-            if s.connect_ex((host, port)) == 0:
-                open_ports.append(port)
-            s.close()
-    except Exception:
-        pass
-    return open_ports
+def scan_basic_ports(target, profile='basic', ports=None, timeout=1.0):
+    """Scanne en parallèle les ports d'un profil (basic, top-20, top-100, top-1000 ou custom)."""
+    return format_open_ports(scan_ports(target, profile, ports, timeout))
 
-def check_ssl_tls_configuration(target):
-    """Récupère les infos SSL/TLS du site."""
+def check_ssl_tls_configuration(target, raise_errors=False):
+    """Récupère les infos SSL/TLS du site. raise_errors : une erreur réseau
+    passagère (timeout, DNS...) est levée au lieu de rendre un résultat inconnu ;
+    un certificat refusé ou l'absence de service sur 443 restent des résultats."""
     info = {"valid": "Inconnu", "issuer": "N/A", "expiration": "N/A"}
     try:
-        hostname = target.replace("https://", "").replace("http://", "").split("/")[0]
+        hostname = urllib.parse.urlsplit(target).hostname
         context = ssl.create_default_context()
         with context.wrap_socket(socket.socket(), server_hostname=hostname) as s:
             s.settimeout(3)
@@ -57,16 +72,22 @@ def check_ssl_tls_configuration(target):
             info["issuer"] = dict(x[0] for x in cert["issuer"])["organizationName"]
             info["expiration"] = cert["notAfter"]
             info["valid"] = "Oui"
-    except Exception:
+    except (ssl.SSLError, ConnectionRefusedError):
         pass
+    except Exception:
+        if raise_errors:
+            raise
     return info
 
-def check_server_version(target):
-    """Détecte le serveur HTTP via les en-têtes de réponse."""
+def check_server_version(target, raise_errors=False):
+    """Détecte le serveur HTTP via les en-têtes de réponse (raise_errors : une
+    requête en échec est levée au lieu de rendre "Non détecté")."""
     try:
         r = requests.head(target, timeout=3)
         return {"server": r.headers.get("Server", "Non détecté")}
     except Exception:
+        if raise_errors:
+            raise
         return {"server": "Non détecté"}
 
 def calculate_security_score(vulnerabilities, open_ports, ssl_info, server_info):
@@ -98,31 +119,218 @@ def generate_executive_summary(target_url, vulnerabilities, open_ports, ssl_info
         "",
         "Vulnérabilités détectées :"
     ]
-    if not vulnerabilities:
+    found = False
+    for v in vulnerabilities:
+        summary.append(f" - {v['type']} ({v['severity']}) : {v['description']}")
+        found = True
+    if not found:
         summary.append(" - Aucune vulnérabilité détectée.")
-    else:
-        for v in vulnerabilities:
-            summary.append(f" - {v['type']} ({v['severity']}) : {v['description']}")
     return "\n".join(summary)
 
 
+# === Définition des tests de vulnérabilités ===
+# fallback_params : paramètres GET injectés quand la cible n'en expose aucun
+VULN_CHECKS = {
+    'sql': {
+        'fallback_params': ['id'],
+        'payloads': ["' OR '1'='1", "' UNION SELECT NULL--", "1' AND 1=1--"],
+        'type': 'SQL Injection',
+        'severity': 'HIGH',
+        'description': 'Erreur SQL detectee dans la reponse'
+    },
+    'xss': {
+        'fallback_params': ['q'],
+        'payloads': ["<script>alert('XSS')</script>", "<img src=x onerror=alert('XSS')>"],
+        'type': 'Cross-Site Scripting (XSS)',
+        'severity': 'MEDIUM',
+        'description': 'Script injecte detecte dans la reponse'
+    },
+    'traversal': {
+        'fallback_params': ['file'],
+        'payloads': ["../../../etc/passwd", "..\\..\\..\\windows\\system32\\drivers\\etc\\hosts"],
+        'type': 'Directory Traversal',
+        'severity': 'HIGH',
+        'description': 'Acces non autorise aux fichiers systeme detecte'
+    },
+    'command': {
+        'fallback_params': ['cmd'],
+        'payloads': ["; ls", "| whoami", "$(id)"],
+        'type': 'Command Injection',
+        'severity': 'CRITICAL',
+        'description': 'Execution de commandes systeme detectee'
+    },
+}
+
+# Lecture des corps de réponse en flux
+STREAM_CHUNK_SIZE = 16384
+
+
+# Mode adaptatif (moteur threads) : borne haute par défaut du pool de tests,
+# en multiple de max_workers (point de départ de l'AIMD)
+ADAPTIVE_HEADROOM = 4
+
+
+def thread_pool_size(max_workers, adaptive=False, adaptive_max_workers=None):
+    """Workers de test du moteur threads. En mode adaptatif, le pool est
+    dimensionné à la borne haute que l'AIMD peut atteindre en partant de
+    max_workers (adaptive_max_workers, par défaut ADAPTIVE_HEADROOM x max_workers)."""
+    if not adaptive:
+        return max_workers
+    return max(max_workers, adaptive_max_workers or ADAPTIVE_HEADROOM * max_workers)
+
+
+def make_decoder(encoding):
+    try:
+        return codecs.getincrementaldecoder(encoding or 'utf-8')(errors='replace')
+    except LookupError:
+        return codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+
+def interests_matched(interests, found):
+    """Intérêts (test, paramètre, payload) validés par les signatures trouvées
+    dans un corps de réponse (signatures.json, en une seule passe sur le texte)."""
+    return [i for i in interests if SIGNATURES.matches(i[0], i[2], found)]
+
+
+class ScanStopped(Exception):
+    """Arrêt coopératif demandé (annulation ou pause) : la tâche en cours est abandonnée."""
+
+
 class VulnerabilityScannerV2:
-    def __init__(self, target_url, max_workers=5, output_dir=None):
-        self.target_url = target_url.rstrip('/')
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
-        self.vulnerabilities = []
-        self.crawled_urls = set()
-        self.forms = []
+    def __init__(self, target_url, max_workers=5, output_dir=None, engine='threads', max_concurrency=500,
+                 crawl_depth=3, crawl_max_pages=200, crawl_fanout=50, crawl_workers=None,
+                 pipeline=False, probe_per_template=3, stream_bodies=True,
+                 max_body_bytes=1048576, body_timeout=5, adaptive=False, adaptive_max_workers=None,
+                 transport=None,
+                 batch_params=False, checkpoint_interval=5, incremental=False,
+                 port_profile='basic', ports=None, port_timeout=1.0,
+                 recon_cache=None, refresh_recon=False, history=None, gzip_results=False):
+        self.target_url = canonicalize_url(target_url)
+        # Résultats : seulement des compteurs en mémoire, le détail est dans
+        # les fichiers JSON Lines du dossier de sortie (ResultStreams)
+        self.findings_count = 0
+        self.findings_by_severity = {'CRITICAL': 0, 'HIGH': 0, 'MEDIUM': 0, 'LOW': 0}
+        self.crawled_count = 0
+        self.forms_count = 0
+        self.form_set = set()
         self.max_workers = max_workers
         self.start_time = None
+        self.scan_duration = None
         self.security_score = 0
         self.ports_info = []
+        # Scan de ports : profil nommé ou liste personnalisée, timeout par connexion
+        self.port_profile = port_profile
+        self.ports = ports
+        self.port_timeout = port_timeout
+        self.port_scan = {}
+        # Cache de recon par hôte (partagé par l'API) ; refresh_recon force de nouvelles sondes
+        self.recon_cache = recon_cache
+        self.refresh_recon = refresh_recon
+        self.recon_sources = {}
+        self.recon_thread = None
+        self.recon_duration = None
         self.ssl_info = {}
         self.server_info = {}
         self.output_dir = output_dir
+        # Index des scans archivés (API) : retrouve le dernier rapport de la cible
+        self.history = history
+        # Moteur de tests : 'threads' (ThreadPoolExecutor) ou 'async' (asyncio + aiohttp)
+        self.engine = engine
+        self.max_concurrency = max_concurrency
+        # Crawler BFS : profondeur, budget de pages, liens suivis par page
+        # (entier ou liste par profondeur) et taille du pool de téléchargement
+        self.crawl_depth = crawl_depth
+        self.crawl_max_pages = crawl_max_pages
+        self.crawl_fanout = crawl_fanout
+        self.crawl_workers = crawl_workers or max_workers
+        # Pool de tests du moteur threads (plus large que max_workers en mode adaptatif)
+        self.test_workers = thread_pool_size(max_workers, adaptive and engine == 'threads', adaptive_max_workers)
+        # Transport HTTP : pool de connexions partagé par l'API (keep-alive entre
+        # scans, session et cookies propres au scan) ou pool propre au scan,
+        # dimensionné pour les workers de test + de crawl
+        self.transport = transport
+        if transport is not None:
+            self.session = transport.session_for(self.target_url)
+        else:
+            self.session = make_session(self.test_workers + self.crawl_workers)
+        self.crawl_frontier_size = 0
+        self.vuln_types = list(VULN_CHECKS)
+        # Mode pipeline : les tests démarrent dès qu'une cible est découverte
+        self.pipeline = pipeline
+        self.pipeline_stats = {}
+        self.pipeline_lock = threading.Lock()
+        self.target_listener = None
+        self.progress_callback = None
+        # Abonnés de l'API : chaque nouvelle vulnérabilité (index, vuln), chaque
+        # page explorée et l'avancement des tests hors pipeline (tâches terminées, total)
+        self.finding_listener = None
+        self.url_listener = None
+        self.test_progress_callback = None
+        # Corps lus en flux : arrêt au premier match ou au plafond d'octets/temps
+        self.stream_bodies = stream_bodies
+        self.max_body_bytes = max_body_bytes
+        self.body_timeout = body_timeout
+        # Concurrence adaptative (AIMD) par hôte : départ à max_workers, montée
+        # jusqu'à la taille du pool (test_workers, max_concurrency en async)
+        self.adaptive = adaptive
+        self.rate = RateController(
+            enabled=adaptive,
+            initial_limit=max_workers,
+            max_limit=max_concurrency if engine == 'async' else max(self.test_workers, self.crawl_workers),
+            neutral=(ScanStopped,)
+        )
+        # Part du budget global de requêtes attribuée par l'ordonnanceur de l'API
+        # (ajustée pendant le scan) ; sans ordonnanceur, pas de limite
+        self.worker_gate = WorkerGate()
+        # Arrêt coopératif ('cancel' ou 'pause') : vérifié avant chaque requête
+        # et entre les étapes du crawl, des tests et de la recon
+        self.stop_event = threading.Event()
+        self.stop_reason = None
+        # Déduplication des cibles : N représentants testés par template d'URL
+        self.probe_index = TemplateIndex(probe_per_template)
+        # Paramètres réels (query strings et champs de formulaires) à injecter
+        self.planner = ProbePlanner()
+        # Requêtes planifiées par l'ensemble des tests / réellement uniques
+        self.probe_stats = {'planned': 0, 'unique': 0, 'bisections': 0, 'skipped': 0}
+        # Injection groupée : un payload dans tous les paramètres, bisection si ça matche
+        self.batch_params = batch_params
+        # Points de reprise : frontière, pages visitées, cibles testées et
+        # résultats écrits périodiquement dans output_dir (checkpoint.json)
+        self.state_lock = threading.RLock()
+        self.publish_lock = threading.Lock()
+        self.checkpoint = CheckpointWriter(output_dir, checkpoint_interval) if output_dir else None
+        # Vulnérabilités, pages explorées et formulaires ajoutés au fil du scan
+        # dans output_dir (JSON Lines, gzip en option) : lisibles pendant le
+        # scan, conservés après un arrêt brutal, recopiés dans le rapport final
+        self.gzip_results = gzip_results
+        if not self.output_dir:
+            # CLI : dossier horodaté créé dès le départ pour y écrire les résultats
+            self.output_dir = self.create_report_directory()
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.results = ResultStreams(self.output_dir, gzip_results)
+        if not os.path.exists(checkpoint_path(self.output_dir)):
+            # Nouveau scan ; en reprise, restore_checkpoint ramène les fichiers au point de reprise
+            self.results.reset()
+        self.checkpoint_meta = {}
+        self.crawl_frontier = None
+        self.crawl_queued = set()
+        self.crawl_in_flight = {}
+        self.crawl_finished = False
+        self.scan_finished = False
+        self.completed = False
+        self.targets = []
+        self.tasks_done = {}
+        # Rescan incrémental : empreintes des pages (ETag, Last-Modified, hash)
+        # comparées au dernier rapport de la cible ; les pages inchangées ne
+        # sont pas re-sondées ('skip') ou seulement avec un payload par test
+        # ('smoke'), et leurs résultats précédents sont repris
+        self.incremental = 'skip' if incremental is True else (incremental or None)
+        self.page_fingerprints = {}
+        self.baseline = None
+        self.incremental_stats = {'baseline': None, 'not_modified': 0, 'unchanged_pages': 0,
+                                  'carried_findings': 0}
+        if self.incremental:
+            self.load_baseline()
 
     def create_report_directory(self):
         if self.output_dir:
@@ -152,98 +360,169 @@ class VulnerabilityScannerV2:
         print(f"Threads paralleles: {self.max_workers}")
         print("=" * 60)
         
-    def test_vulnerability(self, url, vuln_type):
+    def build_plan(self, url, vuln_types=None, smoke=False):
+        """
+        Plan de sondes d'une URL, commun à tous les tests : chaque requête
+        unique (méthode, url_de_test, données) est associée à la liste des
+        tests intéressés par sa réponse, sous forme (test, paramètres, payload).
+        Deux tests qui planifient la même requête ne l'envoient qu'une fois et
+        sa réponse n'est évaluée que pour eux : un test n'est jamais crédité
+        du payload d'un autre.
+        En mode batch_params, une sonde couvre tous les paramètres de l'URL ;
+        en mode smoke, seul le premier payload de chaque test est envoyé.
+        """
+        plan = {}
+        planned = 0
+        vuln_types = [vuln_type for vuln_type in vuln_types or self.vuln_types if vuln_type in VULN_CHECKS]
+        for vuln_type in vuln_types:
+            check = VULN_CHECKS[vuln_type]
+            if smoke:
+                check = dict(check, payloads=check['payloads'][:1])
+            for method, test_url, data, params, payload in self.planner.plan(
+                    url, check, batch=self.batch_params):
+                plan.setdefault((method, test_url, data), []).append((vuln_type, params, payload))
+                planned += 1
+        with self.pipeline_lock:
+            self.probe_stats['planned'] += planned
+            self.probe_stats['unique'] += len(plan)
+        return plan
+
+    def bisect_probes(self, url, matched):
+        """Coupe en deux chaque groupe de paramètres dont la sonde a déclenché
+        une signature : une sonde par moitié, pour retrouver le paramètre
+        fautif. Les moitiés identiques de plusieurs tests (même requête) sont
+        regroupées : une seule sonde par requête."""
+        probes = {}
+        for vuln_type, params, payload in matched:
+            check = VULN_CHECKS[vuln_type]
+            middle = len(params) // 2
+            for half in (params[:middle], params[middle:]):
+                key = self.planner.request_for(url, check, half, payload)
+                probes.setdefault(key, []).append((vuln_type, half, payload))
+        with self.pipeline_lock:
+            self.probe_stats['bisections'] += len(matched)
+        return probes
+
+    def make_finding(self, url, vuln_type, payload, parameter):
+        check = VULN_CHECKS[vuln_type]
+        return {
+            'type': check['type'],
+            'url': url,
+            'parameter': parameter,
+            'payload': payload,
+            'severity': check['severity'],
+            'description': check['description']
+        }
+
+    def iter_body_text(self, response):
+        """Décode le corps d'une réponse requests en flux, par morceaux, jusqu'à
+        max_body_bytes octets ou body_timeout secondes."""
+        decoder = make_decoder(response.encoding)
+        read = 0
+        deadline = time.time() + self.body_timeout
+        for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+            read += len(chunk)
+            yield decoder.decode(chunk)
+            if read >= self.max_body_bytes or time.time() > deadline:
+                break
+        yield decoder.decode(b'', final=True)
+
+    async def iter_body_text_async(self, response):
+        decoder = make_decoder(response.charset)
+        read = 0
+        async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+            read += len(chunk)
+            yield decoder.decode(chunk)
+            if read >= self.max_body_bytes:
+                break
+        yield decoder.decode(b'', final=True)
+
+    def probe(self, method, test_url, data, interests):
+        """Envoie une requête de test et retourne les intérêts (test, paramètre,
+        payload) validés par la réponse ; en mode stream_bodies, la lecture
+        s'arrête dès que tous les tests intéressés sont validés."""
+        with self.worker_gate, self.rate.slot(test_url) as slot:
+            self.check_stop()
+            if not self.stream_bodies:
+                response = self.session.request(method, test_url, data=data, timeout=3)
+                slot.observe(response.status_code, response.headers)
+                return interests_matched(interests, SIGNATURES.scan(response.text))
+
+            with self.session.request(method, test_url, data=data, timeout=3, stream=True) as response:
+                slot.observe(response.status_code, response.headers)
+                stream = SIGNATURES.stream()
+                for text in self.iter_body_text(response):
+                    hits = interests_matched(interests, stream.feed(text))
+                    if len(hits) == len(interests):
+                        return hits
+                return interests_matched(interests, stream.close())
+
+    async def probe_async(self, session, method, test_url, data, interests):
+        async with self.worker_gate, self.rate.slot(test_url) as slot:
+            self.check_stop()
+            async with session.request(method, test_url, data=data) as response:
+                slot.observe(response.status, response.headers)
+                if not self.stream_bodies:
+                    return interests_matched(interests, SIGNATURES.scan(await response.text(errors='replace')))
+
+                stream = SIGNATURES.stream()
+                async for text in self.iter_body_text_async(response):
+                    hits = interests_matched(interests, stream.feed(text))
+                    if len(hits) == len(interests):
+                        return hits
+                return interests_matched(interests, stream.close())
+
+    def collect_findings(self, url, vuln_types, hits):
+        """Un résultat au plus par (test, paramètre) : premier payload qui
+        fonctionne, paramètre par paramètre, payload par payload."""
         results = []
-        
-        if vuln_type == 'sql':
-            sql_payloads = ["' OR '1'='1", "' UNION SELECT NULL--", "1' AND 1=1--"]
-            error_patterns = [
-                r"SQL syntax.*MySQL", r"Warning.*mysql_.*", 
-                r"PostgreSQL.*ERROR", r"ORA-[0-9]{4}"
-            ]
-            
-            for payload in sql_payloads:
-                try:
-                    test_url = f"{url}?id={payload}"
-                    response = self.session.get(test_url, timeout=3)
-                    
-                    for pattern in error_patterns:
-                        if re.search(pattern, response.text, re.IGNORECASE):
-                            results.append({
-                                'type': 'SQL Injection',
-                                'url': url,
-                                'payload': payload,
-                                'severity': 'HIGH',
-                                'description': 'Erreur SQL detectee dans la reponse'
-                            })
-                            break
-                except:
-                    continue
-                    
-        elif vuln_type == 'xss':
-            xss_payloads = [
-                "<script>alert('XSS')</script>",
-                "<img src=x onerror=alert('XSS')>"
-            ]
-            
-            for payload in xss_payloads:
-                try:
-                    test_url = f"{url}?q={urllib.parse.quote(payload)}"
-                    response = self.session.get(test_url, timeout=3)
-                    
-                    if payload in response.text:
-                        results.append({
-                            'type': 'Cross-Site Scripting (XSS)',
-                            'url': url,
-                            'payload': payload,
-                            'severity': 'MEDIUM',
-                            'description': 'Script injecte detecte dans la reponse'
-                        })
-                        break
-                except:
-                    continue
-                    
-        elif vuln_type == 'traversal':
-            traversal_payloads = ["../../../etc/passwd", "..\\..\\..\\windows\\system32\\drivers\\etc\\hosts"]
-            
-            for payload in traversal_payloads:
-                try:
-                    test_url = f"{url}?file={payload}"
-                    response = self.session.get(test_url, timeout=3)
-                    
-                    if "root:" in response.text or "[drivers]" in response.text:
-                        results.append({
-                            'type': 'Directory Traversal',
-                            'url': url,
-                            'payload': payload,
-                            'severity': 'HIGH',
-                            'description': 'Acces non autorise aux fichiers systeme detecte'
-                        })
-                        break
-                except:
-                    continue
-                    
-        elif vuln_type == 'command':
-            cmd_payloads = ["; ls", "| whoami", "$(id)"]
-            
-            for payload in cmd_payloads:
-                try:
-                    test_url = f"{url}?cmd={urllib.parse.quote(payload)}"
-                    response = self.session.get(test_url, timeout=3)
-                    
-                    if any(ind in response.text for ind in ['uid=', 'gid=', 'root:']):
-                        results.append({
-                            'type': 'Command Injection',
-                            'url': url,
-                            'payload': payload,
-                            'severity': 'CRITICAL',
-                            'description': 'Execution de commandes systeme detectee'
-                        })
+        for vuln_type in vuln_types or self.vuln_types:
+            check = VULN_CHECKS.get(vuln_type)
+            if check is None:
+                continue
+            for param in self.planner.parameters(url, check):
+                for payload in check['payloads']:
+                    if (vuln_type, param, payload) in hits:
+                        results.append(self.make_finding(url, vuln_type, payload, param))
                         break
-                except:
-                    continue
-                    
         return results
+
+    def test_vulnerability(self, url, vuln_types=None):
+        """Exécute tous les tests demandés sur une URL à partir d'un plan commun."""
+        self.check_stop()
+        carried = self.carried_findings(url, vuln_types)
+        if carried is not None and self.incremental != 'smoke':
+            return carried
+        hits = set()
+        found = set()
+
+        def run(key, interests):
+            # Requête inutile si tous ses tests ont déjà un résultat pour ses paramètres
+            pending = [i for i in interests if any((i[0], param) not in found for param in i[1])]
+            if not pending:
+                with self.pipeline_lock:
+                    self.probe_stats['skipped'] += 1
+                return
+            try:
+                matched = self.probe(*key, pending)
+            except:
+                return
+            groups = []
+            for vuln_type, params, payload in matched:
+                if len(params) == 1:
+                    hits.add((vuln_type, params[0], payload))
+                    found.add((vuln_type, params[0]))
+                else:
+                    groups.append((vuln_type, params, payload))
+            for sub_key, sub_interests in self.bisect_probes(url, groups).items():
+                run(sub_key, sub_interests)
+
+        for key, interests in self.build_plan(url, vuln_types, smoke=carried is not None).items():
+            run(key, interests)
+
+        # Cible incomplète si des sondes ont été abandonnées : elle sera rejouée à la reprise
+        self.check_stop()
+        return self.merge_carried(self.collect_findings(url, vuln_types, hits), carried)
         
     def check_security_headers(self, url):
         try:
@@ -271,103 +550,663 @@ class VulnerabilityScannerV2:
         except:
             return []
             
-    def crawl_website(self, start_url, max_depth=2, current_depth=0):
-        if current_depth >= max_depth or start_url in self.crawled_urls:
-            return
-            
-        self.crawled_urls.add(start_url)
-        print(f"Exploration: {start_url}")
-        
+    def resolve_link(self, page_url, link):
+        return canonicalize_url(urllib.parse.urljoin(page_url, link))
+
+    def fetch_page(self, url):
+        """Télécharge une page pour le crawler (None en cas d'erreur ou de 304)
+        et enregistre son empreinte."""
+        print(f"Exploration: {url}")
+        headers = self.baseline.conditional_headers(url) if self.baseline else {}
         try:
-            response = self.session.get(start_url, timeout=5)
-            
-            links = re.findall(r'href=[\'"]?([^\'" >]+)', response.text)
-            for link in links[:8]:
-                if link.startswith('http'):
-                    full_url = link
-                elif link.startswith('/'):
-                    full_url = f"{self.target_url}{link}"
+            with self.worker_gate, self.rate.slot(url) as slot:
+                self.check_stop()
+                if not self.stream_bodies:
+                    response = self.session.get(url, timeout=5, headers=headers)
+                    slot.observe(response.status_code, response.headers)
+                    html = response.text
                 else:
-                    full_url = f"{start_url.rstrip('/')}/{link}"
-                    
-                if self.target_url in full_url and full_url not in self.crawled_urls:
-                    self.crawl_website(full_url, max_depth, current_depth + 1)
-                    
-            forms = re.findall(r'<form[^>]*action=[\'"]?([^\'" >]*)[\'"]?[^>]*>', response.text, re.IGNORECASE)
-            for form_action in forms:
-                if form_action:
-                    if form_action.startswith('/'):
-                        form_url = f"{self.target_url}{form_action}"
-                    elif not form_action.startswith('http'):
-                        form_url = f"{start_url.rstrip('/')}/{form_action}"
-                    else:
-                        form_url = form_action
-                    self.forms.append(form_url)
+                    with self.session.get(url, timeout=5, stream=True, headers=headers) as response:
+                        slot.observe(response.status_code, response.headers)
+                        html = ''.join(self.iter_body_text(response))
+            self.record_fingerprint(url, response, html)
+            return None if response.status_code == 304 else html
         except:
-            pass
+            return None
+
+    def record_fingerprint(self, url, response, html):
+        fingerprint = {
+            'status': response.status_code,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'hash': body_hash(html)
+        }
+        if response.status_code == 304:
+            # Non modifiée : on garde l'empreinte précédente pour le prochain scan
+            previous = self.baseline.previous(url)
+            fingerprint['etag'] = fingerprint['etag'] or previous.get('etag')
+            fingerprint['last_modified'] = fingerprint['last_modified'] or previous.get('last_modified')
+            fingerprint['hash'] = previous.get('hash')
+            with self.pipeline_lock:
+                self.incremental_stats['not_modified'] += 1
+        with self.state_lock:
+            self.page_fingerprints[url] = fingerprint
+
+    def register_form(self, form_url, method, fields):
+        self.planner.add_form(form_url, method, fields)
+        if form_url in self.form_set:
+            return
+        self.form_set.add(form_url)
+        self.forms_count += 1
+        self.results.add_form(form_url)
+        self.emit_target(form_url)
+
+    def parse_page(self, page_url, html):
+        """Extrait les liens internes et enregistre les formulaires d'une page."""
+        links = []
+        for link in re.findall(r'href=[\'"]?([^\'" >]+)', html):
+            full_url = self.resolve_link(page_url, link)
+            if self.target_url in full_url:
+                links.append(full_url)
+
+        page_forms = []
+        for form_action, method, fields in parse_forms(html):
+            # Action vide : le formulaire est soumis à la page elle-même
+            form_url = self.resolve_link(page_url, form_action)
+            page_forms.append([form_url, method, [list(field) for field in fields]])
+            self.register_form(form_url, method, fields)
+
+        # Liens et formulaires conservés dans l'empreinte (rejoués sur un 304)
+        if page_url in self.page_fingerprints:
+            self.page_fingerprints[page_url].update(links=links, forms=page_forms)
+        return links
+
+    def replay_page(self, page_url):
+        """Page non modifiée (304) : liens et formulaires repris du scan précédent."""
+        previous = self.baseline.previous(page_url) if self.baseline else None
+        if not previous or self.page_fingerprints.get(page_url, {}).get('status') != 304:
+            return None
+        for form_url, method, fields in previous.get('forms', []):
+            self.register_form(form_url, method, [tuple(field) for field in fields])
+        links = previous.get('links', [])
+        self.page_fingerprints[page_url].update(links=links, forms=previous.get('forms', []))
+        return links
+
+    def crawl_fanout_at(self, depth):
+        """Nombre maximum de liens suivis par page à une profondeur donnée."""
+        if isinstance(self.crawl_fanout, (list, tuple)):
+            if not self.crawl_fanout:
+                return 0
+            return self.crawl_fanout[min(depth, len(self.crawl_fanout) - 1)]
+        return self.crawl_fanout
+
+    def crawl_website(self, start_url, max_depth=None, max_pages=None):
+        """Crawl en largeur (BFS) sur une frontière FIFO : jusqu'à crawl_workers
+        pages sont téléchargées en parallèle, dans la limite de max_pages pages.
+        Après une reprise, le crawl repart de la frontière sauvegardée.
+        La recon de l'hôte démarre en même temps, en arrière-plan."""
+        self.start_recon()
+        if self.crawl_finished or self.stopping():
+            return
+        max_depth = self.crawl_depth if max_depth is None else max_depth
+        max_pages = self.crawl_max_pages if max_pages is None else max_pages
+
+        if self.crawl_frontier is None:
+            start_url = canonicalize_url(start_url)
+            self.crawl_frontier = deque([(start_url, 0)])
+            self.crawl_queued = {start_url}
+        frontier = self.crawl_frontier
+        queued = self.crawl_queued
+        in_flight = self.crawl_in_flight
+        with ThreadPoolExecutor(max_workers=self.crawl_workers) as executor:
+            while frontier or in_flight:
+                with self.state_lock:
+                    # Pas de doublon dans la frontière : queued contient tout lien déjà suivi
+                    while frontier and len(in_flight) < self.crawl_workers and self.crawled_count + len(in_flight) < max_pages:
+                        url, depth = frontier.popleft()
+                        if depth >= max_depth:
+                            continue
+                        in_flight[executor.submit(self.fetch_page, url)] = (url, depth)
+
+                self.crawl_frontier_size = len(frontier)
+                if not in_flight:
+                    break
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                if self.stopping():
+                    # Pages en vol laissées dans in_flight : remises en frontière au point de reprise
+                    return
+                with self.state_lock:
+                    for future in done:
+                        page_url, depth = in_flight.pop(future)
+                        html = future.result()
+                        self.crawled_count += 1
+                        # Cible émise une fois la page téléchargée (empreinte connue)
+                        self.emit_target(page_url)
+                        if self.url_listener:
+                            self.url_listener(page_url)
+                        if html is None:
+                            links = self.replay_page(page_url)
+                        else:
+                            links = self.parse_page(page_url, html)
+                        self.results.add_url(page_url)
+                        # Empreinte complète (liens et formulaires compris) : écrite une fois
+                        if page_url in self.page_fingerprints:
+                            self.results.add_fingerprint(page_url, self.page_fingerprints[page_url])
+                        if links is None or depth + 1 >= max_depth:
+                            continue
+                        followed = 0
+                        fanout = self.crawl_fanout_at(depth)
+                        for link in links:
+                            if followed >= fanout:
+                                break
+                            if link in queued:
+                                continue
+                            queued.add(link)
+                            frontier.append((link, depth + 1))
+                            followed += 1
+                self.save_checkpoint()
+
+        self.crawl_finished = True
+        self.save_checkpoint(force=True)
             
+    def check_async_engine(self):
+        if self.engine == 'async' and aiohttp is None:
+            print("[!] aiohttp non installe, retour au moteur threads")
+            self.engine = 'threads'
+        return self.engine == 'async'
+
     def scan_vulnerabilities_parallel(self):
         print("\n[+] Analyse des vulnerabilites avec execution parallele...")
         
-        all_urls = list(self.crawled_urls) + self.forms
-        total_urls = len(all_urls)
-        vuln_types = ['sql', 'xss', 'traversal', 'command']
-        
-        tasks = []
-        for url in all_urls:
-            for vuln_type in vuln_types:
-                tasks.append((url, vuln_type))
+        if self.scan_finished:
+            return
+        if not self.targets:
+            # Pages et formulaires relus dans leurs fichiers
+            discovered = itertools.chain(self.iter_results(URLS_FILE), self.iter_results(FORMS_FILE))
+            self.targets = [url for url in discovered if self.probe_index.admit(url)]
+        total_urls = len(self.targets)
         
+        # Une tâche par URL : le plan de sondes est commun à tous les tests.
+        # Après une reprise, seuls les tests non terminés sont relancés.
+        tasks = [(url, self.pending_checks(url)) for url in self.targets]
+        tasks = [(url, checks) for url, checks in tasks if checks]
+
+        if self.check_async_engine():
+            self.run_async(self.scan_vulnerabilities_async(tasks))
+            if not self.stopping():
+                self.finish_scan()
+            return
+
         completed = 0
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+        with ThreadPoolExecutor(max_workers=self.test_workers) as executor:
             future_to_task = {
-                executor.submit(self.test_vulnerability, url, vuln_type): (url, vuln_type)
-                for url, vuln_type in tasks
+                executor.submit(self.test_vulnerability, url, checks): (url, checks)
+                for url, checks in tasks
             }
             
             for future in as_completed(future_to_task):
+                if self.stopping():
+                    # Les tâches pas encore démarrées échouent aussitôt (ScanStopped)
+                    continue
                 completed += 1
                 if completed % 10 == 0:
                     progress = (completed / len(tasks)) * 100
                     print(f"[{completed}/{len(tasks)}] Progression: {progress:.1f}%")
                 
                 try:
-                    results = future.result()
-                    if results:
-                        self.vulnerabilities.extend(results)
+                    url, checks = future_to_task[future]
+                    self.finish_target(url, checks, future.result())
                 except:
                     continue
+                if self.test_progress_callback:
+                    self.test_progress_callback(completed, len(tasks))
         
-        self.vulnerabilities.extend(self.check_security_headers(self.target_url))
+        if not self.stopping():
+            self.finish_scan()
+
+    def pending_checks(self, url):
+        """Tests pas encore terminés pour une cible."""
+        done = self.tasks_done.get(url, ())
+        return [vuln_type for vuln_type in self.vuln_types if vuln_type not in done]
+
+    def finish_target(self, url, checks, results):
+        """Enregistre les résultats d'une cible et marque ses tests comme terminés."""
+        self.add_findings(results, done=(url, checks))
+        self.save_checkpoint()
+
+    def add_findings(self, results, done=None):
+        """
+        Ajoute des résultats (et marque done = (url, tests) comme terminé sous
+        le même verrou), puis les écrit et les signale un par un, dans l'ordre
+        des index. Écriture et abonnés passent hors de state_lock : seul
+        publish_lock, pris avant de le relâcher, ordonne les workers entre eux.
+        """
+        results = list(results or [])
+        with self.state_lock:
+            first = self.findings_count
+            self.findings_count += len(results)
+            for vuln in results:
+                self.findings_by_severity[severity_of(vuln)] += 1
+            if done:
+                self.tasks_done.setdefault(done[0], set()).update(done[1])
+            if not results:
+                return
+            self.publish_lock.acquire()
+        try:
+            for index, vuln in enumerate(results, first):
+                self.results.add_finding(vuln)
+                if self.finding_listener:
+                    self.finding_listener(index, vuln)
+        finally:
+            self.publish_lock.release()
+
+    # === Rescan incrémental ===
+
+    def load_baseline(self):
+        if self.output_dir:
+            scans_dir = os.path.dirname(os.path.abspath(self.output_dir))
+        else:
+            scans_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scans")
+        folders = None
+        if self.history is not None:
+            exclude = os.path.basename(os.path.abspath(self.output_dir)) if self.output_dir else None
+            folders = [os.path.join(scans_dir, scan_id)
+                       for scan_id in self.history.scans_for_target(self.target_url, exclude)]
+        report = find_previous_report(scans_dir, self.target_url, exclude_dir=self.output_dir, folders=folders)
+        if report is None:
+            print("[!] Aucun scan précédent avec empreintes : scan complet")
+            return
+        self.baseline = PageBaseline(report)
+        self.incremental_stats['baseline'] = self.baseline.scan_date
+        print(f"[+] Scan incrémental (référence du {self.baseline.scan_date})")
+
+    def carried_findings(self, url, vuln_types=None):
+        """Résultats repris du scan précédent si la cible n'a pas changé, sinon None."""
+        if self.baseline is None or not self.baseline.unchanged(url, self.page_fingerprints.get(url)):
+            return None
+        types = {VULN_CHECKS[vt]['type'] for vt in vuln_types or self.vuln_types if vt in VULN_CHECKS}
+        carried = self.baseline.carried_findings(url, types)
+        with self.pipeline_lock:
+            self.incremental_stats['unchanged_pages'] += 1
+            self.incremental_stats['carried_findings'] += len(carried)
+        return carried
+
+    def merge_carried(self, results, carried):
+        """Résultats du test smoke complétés par ceux repris du scan précédent."""
+        if not carried:
+            return results
+        found = {(v['type'], v.get('parameter')) for v in results}
+        return results + [v for v in carried if (v['type'], v.get('parameter')) not in found]
+
+    def finish_scan(self):
+        headers = self.check_security_headers(self.target_url)
+        self.add_findings(headers)
+        with self.state_lock:
+            self.scan_finished = True
+        self.save_checkpoint(force=True)
+
+    # === Arrêt coopératif ===
+
+    def request_stop(self, reason='cancel'):
+        """Demande l'arrêt du scan ('cancel' ou 'pause') : plus aucune requête
+        n'est envoyée, les requêtes en vol se terminent (timeouts bornés) et
+        les tâches interrompues ne sont pas marquées terminées."""
+        self.stop_reason = reason
+        self.stop_event.set()
+
+    def stopping(self):
+        return self.stop_event.is_set()
+
+    def check_stop(self):
+        if self.stop_event.is_set():
+            raise ScanStopped()
+
+    def iter_results(self, name):
+        """Enregistrements d'un fichier de résultats du scan, lus en flux."""
+        return iter_jsonl(stream_path(self.results.folder, name))
+
+    # === Points de reprise ===
+
+    def checkpoint_state(self):
+        """Curseur du scan (frontière, cibles et tests terminés) ; les résultats
+        restent dans leurs fichiers JSON Lines, dont seul le nombre
+        d'enregistrements est noté. publish_lock garantit que ces nombres
+        correspondent aux tests marqués terminés."""
+        with self.state_lock, self.publish_lock:
+            # Pages en cours de téléchargement : remises en tête de frontière
+            in_flight = list(self.crawl_in_flight.values())
+            frontier = None
+            if self.crawl_frontier is not None:
+                frontier = [list(item) for item in in_flight + list(self.crawl_frontier)]
+            return {
+                'version': 2,
+                'target': self.target_url,
+                'meta': self.checkpoint_meta,
+                'updated_at': datetime.now().isoformat(),
+                'elapsed': round(time.time() - self.start_time, 2) if self.start_time else 0,
+                'crawl_finished': self.crawl_finished,
+                'scan_finished': self.scan_finished,
+                'completed': self.completed,
+                'frontier': frontier,
+                'queued': list(self.crawl_queued),
+                'form_fields': self.planner.snapshot(),
+                'targets': list(self.targets),
+                'tasks_done': {url: sorted(checks) for url, checks in self.tasks_done.items()},
+                'probe_stats': dict(self.probe_stats),
+                'severity_counts': dict(self.findings_by_severity),
+                'streams': dict(self.results.counts)
+            }
+
+    def save_checkpoint(self, force=False):
+        if self.checkpoint is None or not (force or self.checkpoint.due()):
+            return
+        try:
+            # Écritures périodiques en arrière-plan : finish_target tourne aussi sur la boucle async partagée
+            self.checkpoint.write(self.checkpoint_state(), wait=force)
+        except Exception as e:
+            print(f"[!] Erreur écriture point de reprise : {e}")
+
+    def restore_checkpoint(self, state):
+        """Recharge l'état d'un scan interrompu : les pages déjà explorées et
+        les tests déjà terminés ne sont pas rejoués."""
+        with self.state_lock:
+            self.crawl_finished = state.get('crawl_finished', False)
+            self.scan_finished = state.get('scan_finished', False)
+            if state.get('frontier') is not None:
+                self.crawl_frontier = deque(tuple(item) for item in state['frontier'])
+            self.crawl_queued = set(state.get('queued', []))
+            self.planner.restore(state.get('form_fields'))
+            self.targets = list(state.get('targets', []))
+            for url in self.targets:
+                self.probe_index.admit(url)
+            self.tasks_done = {url: set(checks) for url, checks in state.get('tasks_done', {}).items()}
+            self.probe_stats.update(state.get('probe_stats', {}))
+            self.start_time = time.time() - state.get('elapsed', 0)
+            if 'streams' in state:
+                # Résultats ajoutés après le dernier point de reprise : retrouvés par la reprise
+                self.results.resume(state['streams'])
+            else:
+                # Point de reprise version 1 : résultats recopiés dans le point de reprise
+                self.results.reset(state.get('findings', []), state.get('visited', []), state.get('forms', []))
+            counts = self.results.counts
+            self.findings_count = counts[FINDINGS_FILE]
+            self.findings_by_severity.update(checkpoint_counts(state))
+            self.crawled_count = counts[URLS_FILE]
+            self.forms_count = counts[FORMS_FILE]
+            self.form_set = set(self.iter_results(FORMS_FILE))
+            self.page_fingerprints = dict(self.iter_results(FINGERPRINTS_FILE))
+        print(f"[+] Reprise du scan : {self.crawled_count} pages explorees, "
+              f"{len(self.tasks_done)}/{len(self.targets)} cibles deja testees")
+
+    def close_session(self):
+        """Fin du scan : le pool partagé de l'hôte est rendu au transport
+        (qui peut alors le fermer), ou le pool propre au scan est fermé."""
+        if self.transport is not None:
+            self.transport.release(self.target_url)
+        else:
+            self.session.close()
+
+    def run_async(self, coro):
+        if self.transport is not None:
+            return self.transport.run(coro)
+        return asyncio.run(coro)
+
+    def open_async_session(self):
+        if self.transport is not None:
+            return self.transport.borrow_async_session()
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency)
+        timeout = aiohttp.ClientTimeout(total=3)
+        return aiohttp.ClientSession(headers=dict(self.session.headers),
+                                     connector=connector, timeout=timeout)
+
+    async def test_vulnerability_async(self, session, semaphore, url, vuln_types=None):
+        """Équivalent asyncio de test_vulnerability : toutes les requêtes uniques
+        du plan partent en même temps, on garde le premier payload qui matche
+        dans l'ordre du plan."""
+
+        self.check_stop()
+        carried = self.carried_findings(url, vuln_types)
+        if carried is not None and self.incremental != 'smoke':
+            return carried
+        hits = set()
+
+        async def run(key, interests):
+            async with semaphore:
+                try:
+                    matched = await self.probe_async(session, *key, interests)
+                except Exception:
+                    return
+            groups = []
+            for vuln_type, params, payload in matched:
+                if len(params) == 1:
+                    hits.add((vuln_type, params[0], payload))
+                else:
+                    groups.append((vuln_type, params, payload))
+            await asyncio.gather(*(run(sub_key, sub_interests) for sub_key, sub_interests
+                                   in self.bisect_probes(url, groups).items()))
+
+        plan = self.build_plan(url, vuln_types, smoke=carried is not None)
+        await asyncio.gather(*(run(key, interests) for key, interests in plan.items()))
+        self.check_stop()
+        return self.merge_carried(self.collect_findings(url, vuln_types, hits), carried)
+
+    async def scan_vulnerabilities_async(self, tasks):
+        """Moteur asyncio : chaque requête de payload est une coroutine,
+        bornée par un sémaphore global de max_concurrency requêtes en vol."""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async with self.open_async_session() as session:
+            async def run(url, checks):
+                try:
+                    return url, checks, await self.test_vulnerability_async(session, semaphore, url, checks)
+                except ScanStopped:
+                    return url, checks, None
+
+            completed = 0
+            coros = [run(url, checks) for url, checks in tasks]
+            for coro in asyncio.as_completed(coros):
+                url, checks, results = await coro
+                if results is None:
+                    continue
+                completed += 1
+                if completed % 10 == 0:
+                    progress = (completed / len(tasks)) * 100
+                    print(f"[{completed}/{len(tasks)}] Progression: {progress:.1f}%")
+                self.finish_target(url, checks, results)
+                if self.test_progress_callback:
+                    self.test_progress_callback(completed, len(tasks))
+
+    # === Mode pipeline : crawl et tests en parallèle ===
+
+    def emit_target(self, url):
+        """Transmet une URL ou un formulaire découvert aux workers de test."""
+        if self.target_listener and self.probe_index.admit(url):
+            with self.state_lock:
+                self.targets.append(url)
+            self.target_listener(url)
+
+    def scan_pipeline(self, progress_callback=None):
+        """Producteur/consommateur : le crawler tourne dans son propre thread et
+        chaque cible découverte est testée immédiatement, sans attendre la fin du crawl."""
+        if self.scan_finished:
+            return
+        print("\n[+] Crawl et analyse en pipeline...")
+        targets = queue.Queue()
+        self.target_listener = targets.put
+        self.pipeline_stats = {
+            'crawl_running': True,
+            'crawl_frontier': 0,
+            'targets_waiting': 0,
+            'tasks_pending': 0,
+            'tasks_completed': 0
+        }
+        self.progress_callback = progress_callback
+
+        # Reprise : cibles déjà découvertes mais pas encore testées
+        for url in self.targets:
+            if self.pending_checks(url):
+                targets.put(url)
+
+        def produce():
+            try:
+                self.crawl_website(self.target_url)
+            finally:
+                self.pipeline_stats['crawl_running'] = False
+                targets.put(None)
+
+        crawler = threading.Thread(target=produce, daemon=True)
+        crawler.start()
+        try:
+            if self.check_async_engine():
+                self.run_async(self.consume_targets_async(targets))
+            else:
+                self.consume_targets_threads(targets)
+        finally:
+            crawler.join()
+            self.target_listener = None
+
+        if self.stopping():
+            return
+        self.finish_scan()
+        self.report_pipeline_progress(targets)
+
+    def on_task_done(self, targets, url, checks, task):
+        """Fin d'une tâche du pipeline ; une tâche interrompue par un arrêt
+        n'est pas marquée terminée."""
+        error = task.exception()
+        if not isinstance(error, ScanStopped):
+            self.finish_target(url, checks, [] if error else task.result())
+        with self.pipeline_lock:
+            self.pipeline_stats['tasks_pending'] -= 1
+            self.pipeline_stats['tasks_completed'] += 1
+        self.report_pipeline_progress(targets)
+
+    def report_pipeline_progress(self, targets):
+        self.pipeline_stats['targets_waiting'] = targets.qsize()
+        self.pipeline_stats['crawl_frontier'] = self.crawl_frontier_size
+        if self.progress_callback:
+            self.progress_callback(dict(self.pipeline_stats))
+
+    def consume_targets_threads(self, targets):
+        with ThreadPoolExecutor(max_workers=self.test_workers) as executor:
+            while True:
+                url = targets.get()
+                if url is None:
+                    break
+                checks = self.pending_checks(url)
+                if not checks:
+                    continue
+                with self.pipeline_lock:
+                    self.pipeline_stats['tasks_pending'] += 1
+                future = executor.submit(self.test_vulnerability, url, checks)
+                future.add_done_callback(
+                    lambda f, url=url, checks=checks: self.on_task_done(targets, url, checks, f)
+                )
+                self.report_pipeline_progress(targets)
+
+    async def consume_targets_async(self, targets):
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        running = set()
+
+        async with self.open_async_session() as session:
+            while True:
+                url = await loop.run_in_executor(None, targets.get)
+                if url is None:
+                    break
+                checks = self.pending_checks(url)
+                if not checks:
+                    continue
+                self.pipeline_stats['tasks_pending'] += 1
+                task = asyncio.create_task(self.test_vulnerability_async(session, semaphore, url, checks))
+                running.add(task)
+                task.add_done_callback(running.discard)
+                task.add_done_callback(
+                    lambda t, url=url, checks=checks: self.on_task_done(targets, url, checks, t)
+                )
+                self.report_pipeline_progress(targets)
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
         
-    def generate_report(self):
-        report_dir = self.create_report_directory()
-        scan_duration = time.time() - self.start_time
+    def cached_recon(self, probe, compute, variant=None):
+        """Résultat d'une sonde de recon, repris du cache par hôte s'il est encore valide."""
+        if self.recon_cache is None:
+            self.recon_sources[probe] = 'scan'
+            return compute()
+        value, cached = self.recon_cache.fetch(host_key(self.target_url), probe, compute,
+                                               variant=variant, force=self.refresh_recon)
+        self.recon_sources[probe] = 'cache' if cached else 'scan'
+        return value
 
-    # === Étape 1 : Lancer les analyses avancées ===
-        print("\n[+] Analyse avancée en cours...")
+    def start_recon(self):
+        """Lance la recon en arrière-plan : elle tourne pendant le crawl et les
+        tests, generate_report attend son résultat (join_recon)."""
+        if self.recon_thread is None:
+            self.recon_thread = threading.Thread(target=self.run_recon, daemon=True, name="recon")
+            self.recon_thread.start()
+
+    def join_recon(self):
+        if self.recon_thread is None:
+            self.run_recon()
+        else:
+            self.recon_thread.join()
+
+    def run_recon(self):
+        """Scan de ports, certificat TLS et en-tête Server de la cible, en parallèle."""
+        if self.stopping():
+            return
+        start = time.time()
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            for future in [executor.submit(self.recon_ports), executor.submit(self.recon_tls),
+                           executor.submit(self.recon_server)]:
+                future.result()
+        self.recon_duration = round(time.time() - start, 2)
 
+    def recon_ports(self):
+        if self.stopping():
+            return
         try:
-            self.ports_info = scan_basic_ports(self.target_url)
+            variant = self.port_profile if not self.ports else 'custom:' + ','.join(map(str, sorted(self.ports)))
+            self.port_scan = self.cached_recon(
+                'ports', lambda: scan_ports(self.target_url, self.port_profile, self.ports, self.port_timeout,
+                                            raise_errors=True),
+                variant=variant)
+            self.ports_info = format_open_ports(self.port_scan)
         except Exception as e:
             print(f"[!] Erreur lors du scan des ports : {e}")
             self.ports_info = []
 
+    def recon_tls(self):
+        if self.stopping():
+            return
         try:
-            self.ssl_info = check_ssl_tls_configuration(self.target_url)
+            self.ssl_info = self.cached_recon('tls', lambda: check_ssl_tls_configuration(self.target_url, raise_errors=True))
         except Exception as e:
             print(f"[!] Erreur SSL/TLS : {e}")
             self.ssl_info = {"valid": "Inconnu", "issuer": "N/A", "expiration": "N/A"}
 
+    def recon_server(self):
+        if self.stopping():
+            return
         try:
-            self.server_info = check_server_version(self.target_url)
+            self.server_info = self.cached_recon('server', lambda: check_server_version(self.target_url, raise_errors=True))
         except Exception as e:
             print(f"[!] Erreur version serveur : {e}")
             self.server_info = {"server": "Non détecté"}
 
+    def generate_report(self):
+        report_dir = self.create_report_directory()
+
+    # === Étape 1 : Lancer les analyses avancées ===
+        print("\n[+] Analyse avancée en cours...")
+        self.join_recon()
+        scan_duration = time.time() - self.start_time
+        self.scan_duration = round(scan_duration, 2)
+
         try:
             self.security_score = calculate_security_score(
-                self.vulnerabilities,
+                self.iter_results(FINDINGS_FILE),
                 self.ports_info,
                 self.ssl_info,
                 self.server_info
@@ -382,42 +1221,61 @@ class VulnerabilityScannerV2:
             "target": self.target_url,
             "scan_date": datetime.now().isoformat(),
             "scan_duration_seconds": round(scan_duration, 2),
-            "total_vulnerabilities": len(self.vulnerabilities),
-            "vulnerabilities": self.vulnerabilities,
-            "crawled_urls": list(self.crawled_urls),
-            "forms_found": self.forms,
+            "total_vulnerabilities": self.findings_count,
+            # Listes recopiées depuis les fichiers JSON Lines du scan
+            "vulnerabilities": None,
+            "crawled_urls": None,
+            "forms_found": None,
+            "page_fingerprints": self.page_fingerprints,
             "performance": {
-                "urls_scanned": len(self.crawled_urls),
+                "urls_scanned": self.crawled_count,
                 "threads_used": self.max_workers,
-                "average_time_per_url": round(scan_duration / len(self.crawled_urls), 2)
-                if self.crawled_urls else 0,
+                "engine": self.engine,
+                "pipeline": self.pipeline,
+                "probe_templates": self.probe_index.stats(),
+                "probe_requests": dict(self.probe_stats),
+                "incremental": dict(self.incremental_stats, mode=self.incremental),
+                "rate_control": self.rate.stats(),
+                "transport": self.transport.host_stats(self.target_url) if self.transport else {},
+                "average_time_per_url": round(scan_duration / self.crawled_count, 2)
+                if self.crawled_count else 0,
             },
             "advanced_analysis": {
                 "open_ports": self.ports_info,
+                "port_scan": self.port_scan,
+                "recon_cache": dict(self.recon_sources),
+                "recon_duration_seconds": self.recon_duration,
                 "ssl_check": self.ssl_info,
                 "server_info": self.server_info,
                 "security_score": self.security_score,
             },
         }
 
+        self.results.close()
         json_file = os.path.join(report_dir, "rapport_scan_v2.json")
-        with open(json_file, "w", encoding="utf-8") as f:
-            json.dump(json_report, f, indent=2, ensure_ascii=False)
+        write_report(json_file, json_report, {
+            "vulnerabilities": self.iter_results(FINDINGS_FILE),
+            "crawled_urls": self.iter_results(URLS_FILE),
+            "forms_found": self.iter_results(FORMS_FILE)
+        })
 
     # === Étape 3 : Génération du rapport HTML ===
-        html_content = self.generate_html_report(scan_duration)
         html_file = os.path.join(report_dir, "rapport_scan_v2.html")
         with open(html_file, "w", encoding="utf-8") as f:
-            f.write(html_content)
+            self.generate_html_report(scan_duration, f)
 
         print(f"\n[+] Rapports générés dans: {report_dir}")
         print(f"    - Rapport JSON: {json_file}")
         print(f"    - Rapport HTML: {html_file}")
 
+        self.completed = True
+        self.save_checkpoint(force=True)
         return report_dir
 
         
-    def generate_html_report(self, scan_duration):
+    def generate_html_report(self, scan_duration, f):
+        """Écrit le rapport HTML dans f, une carte de vulnérabilité à la fois
+        (lues dans findings.jsonl)."""
         # Récupération sécurisée des données
         ports_info = getattr(self, 'ports_info', []) or []
         ssl_info = getattr(self, 'ssl_info', {}) or {}
@@ -425,11 +1283,7 @@ class VulnerabilityScannerV2:
         score = getattr(self, 'security_score', 0)
         
         # Stats par sévérité
-        severity_counts = {'CRITICAL': 0, 'HIGH': 0, 'MEDIUM': 0, 'LOW': 0}
-        for v in self.vulnerabilities:
-            s = v.get('severity', 'LOW').upper()
-            if s in severity_counts:
-                severity_counts[s] += 1
+        severity_counts = self.findings_by_severity
 
         # Couleur du score
         if score >= 80: score_class = 'score-good'
@@ -570,15 +1424,15 @@ class VulnerabilityScannerV2:
                                 <span class="stat-label">Élevées</span>
                             </div>
                             <div class="stat-item">
-                                <span class="stat-value">{len(self.vulnerabilities)}</span>
+                                <span class="stat-value">{self.findings_count}</span>
                                 <span class="stat-label">Total Vuln.</span>
                             </div>
                             <div class="stat-item">
-                                <span class="stat-value">{len(self.crawled_urls)}</span>
+                                <span class="stat-value">{self.crawled_count}</span>
                                 <span class="stat-label">URLs Scannées</span>
                             </div>
                             <div class="stat-item">
-                                <span class="stat-value">{len(self.forms)}</span>
+                                <span class="stat-value">{self.forms_count}</span>
                                 <span class="stat-label">Formulaires</span>
                             </div>
                             <div class="stat-item">
@@ -623,16 +1477,18 @@ class VulnerabilityScannerV2:
                 <div class="vuln-list">
         """
 
+        f.write(html)
+
         # Boucle sur les vulnérabilités
-        if not self.vulnerabilities:
-            html += """<div class="card" style="text-align:center; padding:40px;">
+        if not self.findings_count:
+            f.write("""<div class="card" style="text-align:center; padding:40px;">
                         <h3 style="color:var(--good);">✅ Aucune vulnérabilité détectée</h3>
                         <p>Le système semble sécurisé selon les tests effectués.</p>
-                       </div>"""
+                       </div>""")
         else:
-            for i, v in enumerate(self.vulnerabilities):
+            for v in self.iter_results(FINDINGS_FILE):
                 sev = v.get('severity', 'LOW').upper()
-                html += f"""
+                f.write(f"""
                 <div class="vuln-card border-{sev} item-{sev}">
                     <div class="vuln-header">
                         <div class="vuln-title">{v['type']}</div>
@@ -643,6 +1499,10 @@ class VulnerabilityScannerV2:
                             <span class="label">URL :</span>
                             <a href="{v['url']}" target="_blank" style="color:var(--primary); text-decoration:none; overflow:hidden; text-overflow:ellipsis; white-space:nowrap;">{v['url']}</a>
                         </div>
+                        <div class="detail-row">
+                            <span class="label">Paramètre :</span>
+                            <code>{v.get('parameter') or '-'}</code>
+                        </div>
                         <div class="detail-row">
                             <span class="label">Payload :</span>
                             <code>{v['payload']}</code>
@@ -653,10 +1513,10 @@ class VulnerabilityScannerV2:
                         </div>
                     </div>
                 </div>
-                """
+                """)
 
         # Fin du HTML et Scripts
-        html += """
+        f.write("""
                 </div>
             </div>
 
@@ -691,34 +1551,31 @@ class VulnerabilityScannerV2:
             </script>
         </body>
         </html>
-        """
-        
-        return html
+        """)
     
     def run_scan(self):
         self.start_time = time.time()
         self.banner()
         
-        print("\n[+] Phase 1: Exploration rapide du site...")
-        self.crawl_website(self.target_url)
-        
-        print(f"\n[+] URLs decouvertes: {len(self.crawled_urls)}")
-        print(f"[+] Formulaires detectes: {len(self.forms)}")
-        
-        self.scan_vulnerabilities_parallel()
+        if self.pipeline:
+            self.scan_pipeline()
+        else:
+            print("\n[+] Phase 1: Exploration rapide du site...")
+            self.crawl_website(self.target_url)
+            
+            print(f"\n[+] URLs decouvertes: {self.crawled_count}")
+            print(f"[+] Formulaires detectes: {self.forms_count}")
+            
+            self.scan_vulnerabilities_parallel()
         
         scan_duration = time.time() - self.start_time
         
         print(f"\n[+] Scan termine en {round(scan_duration, 2)} secondes!")
-        print(f"[+] Vulnerabilites trouvees: {len(self.vulnerabilities)}")
-        
-        severity_count = {}
-        for vuln in self.vulnerabilities:
-            severity = vuln['severity']
-            severity_count[severity] = severity_count.get(severity, 0) + 1
+        print(f"[+] Vulnerabilites trouvees: {self.findings_count}")
             
-        for severity, count in severity_count.items():
-            print(f"    - {severity}: {count}")
+        for severity, count in self.findings_by_severity.items():
+            if count:
+                print(f"    - {severity}: {count}")
             
         report_dir = self.generate_report()
         
@@ -732,22 +1589,12 @@ class VulnerabilityScannerV2:
                 # === [INNOVATIONS SUPPLÉMENTAIRES] ===
         print("\n[+] Début des analyses avancées...")
 
-        # 1️⃣ Scan basique des ports
-        print("\n[+] Scan rapide des ports ouverts...")
-        self.ports_info = scan_basic_ports(self.target_url)
-
-        # 2️⃣ Vérification SSL/TLS
-        print("\n[+] Vérification de la configuration SSL/TLS...")
-        self.ssl_info = check_ssl_tls_configuration(self.target_url)
-
-        # 3️⃣ Détection de la version du serveur
-        print("\n[+] Détection de la version du serveur...")
-        self.server_info = check_server_version(self.target_url)
+        # 1️⃣ 2️⃣ 3️⃣ Ports, SSL/TLS et serveur : déjà collectés par generate_report (run_recon)
 
         # 4️⃣ Calcul du score global de sécurité
         print("\n[+] Calcul du score global de sécurité...")
         self.security_score = calculate_security_score(
-            vulnerabilities=self.vulnerabilities,
+            vulnerabilities=self.iter_results(FINDINGS_FILE),
             open_ports=self.ports_info,
             ssl_info=self.ssl_info,
             server_info=self.server_info
@@ -757,7 +1604,7 @@ class VulnerabilityScannerV2:
         print("\n[+] Génération du résumé exécutif...")
         summary_text = generate_executive_summary(
             target_url=self.target_url,
-            vulnerabilities=self.vulnerabilities,
+            vulnerabilities=self.iter_results(FINDINGS_FILE),
             open_ports=self.ports_info,
             ssl_info=self.ssl_info,
             score=self.security_score
@@ -824,4 +1671,4 @@ def main():
         print(f"\n[!] Erreur: {e}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
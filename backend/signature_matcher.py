@@ -0,0 +1,112 @@
+import json
+import os
+import re
+
+# '.*' final : ne change pas la présence d'une signature, mais son match
+# avalerait la fin de la ligne et masquerait les signatures qui y commencent
+TRAILING_ANY = re.compile(r'(?<!\\)\.\*$')
+
+
+class SignatureSet:
+    """
+    Jeu de signatures compilé en une seule alternance regex, parcourue en un
+    seul passage : après chaque match, la recherche reprend au caractère
+    suivant son début, pour voir aussi les signatures qui le chevauchent.
+    Le '.*' final des signatures regex est retiré (il ne change pas leur
+    présence et rendrait les matchs aussi longs que la ligne).
+
+    Chaque signature déclare les tests ('sql', 'xss'...) qu'elle valide et,
+    optionnellement, le payload dont elle est le reflet (cas du XSS).
+    """
+
+    def __init__(self, signatures):
+        self.signatures = {}
+        self.group_to_id = {}
+        alternatives = []
+        for index, sig in enumerate(signatures):
+            pattern = TRAILING_ANY.sub('', sig['pattern']) if sig.get('regex') else re.escape(sig['pattern'])
+            if sig.get('ignore_case'):
+                pattern = f"(?i:{pattern})"
+            group = f"s{index}"
+            alternatives.append(f"(?P<{group}>{pattern})")
+            self.group_to_id[group] = sig['id']
+            self.signatures[sig['id']] = sig
+        self.regex = re.compile('|'.join(alternatives)) if alternatives else None
+
+    def scan(self, text):
+        """Retourne l'ensemble des identifiants de signatures présents dans le texte."""
+        found = set()
+        if self.regex is None or not text:
+            return found
+        match = self.regex.search(text)
+        while match is not None:
+            found.add(self.group_to_id[match.lastgroup])
+            if len(found) == len(self.signatures):
+                break
+            match = self.regex.search(text, match.start() + 1)
+        return found
+
+    def stream(self):
+        return SignatureStream(self)
+
+    def matches(self, vuln_type, payload, found):
+        """Indique si les signatures trouvées valident le test vuln_type pour ce payload."""
+        for sig_id in found:
+            sig = self.signatures[sig_id]
+            if vuln_type not in sig['checks']:
+                continue
+            if sig.get('payload') and sig['payload'] != payload:
+                continue
+            return True
+        return False
+
+
+class SignatureStream:
+    """
+    Analyse incrémentale d'un corps reçu par morceaux. Les signatures ne
+    traversent pas les retours à la ligne ('.' ne les couvre pas) : seules
+    les lignes complètes sont analysées, la ligne en cours est reportée.
+    Une ligne trop longue (HTML minifié) est analysée par fenêtres qui se
+    chevauchent de overlap caractères.
+    """
+
+    def __init__(self, signature_set, max_carry=65536, overlap=512):
+        self.signature_set = signature_set
+        self.max_carry = max_carry
+        self.overlap = overlap
+        self.carry = ''
+        self.found = set()
+
+    def feed(self, text):
+        data = self.carry + text
+        cut = data.rfind('\n') + 1
+        if cut == 0 and len(data) > self.max_carry:
+            self.found |= self.signature_set.scan(data)
+            self.carry = data[-self.overlap:]
+            return self.found
+        if cut:
+            self.found |= self.signature_set.scan(data[:cut])
+        self.carry = data[cut:]
+        return self.found
+
+    def close(self):
+        self.found |= self.signature_set.scan(self.carry)
+        self.carry = ''
+        return self.found
+
+
+def load_signatures(path=None):
+    if path is None:
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "signatures.json")
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        signatures = data.get("signatures", [])
+        print(f"[INFO] Signatures chargées : {len(signatures)} entrées.")
+        return SignatureSet(signatures)
+    except Exception as e:
+        print(f"[ERREUR] Échec chargement signatures.json : {e}")
+        return SignatureSet([])
+
+
+SIGNATURES = load_signatures()
@@ -0,0 +1,108 @@
+import re
+import threading
+import urllib.parse
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+# Segments de chemin considérés comme des identifiants dans les templates
+NUMERIC_SEGMENT = re.compile(r'^\d+$')
+ID_SEGMENT = re.compile(r'^(?:[0-9a-fA-F]{16,}|[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12})$')
+
+
+def remove_dot_segments(path):
+    """Résout les segments './' et '../' d'un chemin absolu."""
+    output = []
+    for segment in path.split('/'):
+        if segment == '..':
+            if len(output) > 1:
+                output.pop()
+        elif segment != '.':
+            output.append(segment)
+    return '/'.join(output)
+
+
+def canonicalize_url(url):
+    """
+    Forme canonique d'une URL : schéma et hôte en minuscules, port par défaut
+    retiré, fragment supprimé, './' et '../' résolus, pas de slash final,
+    paramètres de requête triés.
+    """
+    try:
+        parts = urllib.parse.urlsplit(url.strip())
+        scheme = parts.scheme.lower()
+        host = parts.hostname or ''
+        port = parts.port
+    except ValueError:
+        return url
+
+    if ':' in host:
+        host = f"[{host}]"
+    netloc = host
+    if port and DEFAULT_PORTS.get(scheme) != port:
+        netloc = f"{host}:{port}"
+    if parts.username:
+        userinfo = parts.username + (f":{parts.password}" if parts.password else '')
+        netloc = f"{userinfo}@{netloc}"
+
+    path = remove_dot_segments(parts.path).rstrip('/')
+    query = urllib.parse.urlencode(sorted(urllib.parse.parse_qsl(parts.query, keep_blank_values=True)))
+    return urllib.parse.urlunsplit((scheme, netloc, path, query, ''))
+
+
+def url_template(url):
+    """
+    Template d'une URL canonique : identifiants du chemin et valeurs des
+    paramètres remplacés par des jokers, ex. /product?id=<n>.
+    """
+    parts = urllib.parse.urlsplit(canonicalize_url(url))
+
+    segments = []
+    for segment in parts.path.split('/'):
+        if NUMERIC_SEGMENT.match(segment):
+            segments.append('<n>')
+        elif ID_SEGMENT.match(segment):
+            segments.append('<id>')
+        else:
+            segments.append(segment)
+
+    params = []
+    for key, value in urllib.parse.parse_qsl(parts.query, keep_blank_values=True):
+        joker = f"{key}=<n>" if value.isdigit() else f"{key}=<s>"
+        if joker not in params:
+            params.append(joker)
+
+    template = f"{parts.scheme}://{parts.netloc}{'/'.join(segments)}"
+    if params:
+        template += '?' + '&'.join(params)
+    return template
+
+
+class TemplateIndex:
+    """
+    Index des URLs par template : seuls les max_per_template premiers
+    représentants d'un template sont retenus pour les tests.
+    """
+
+    def __init__(self, max_per_template=3):
+        self.max_per_template = max_per_template
+        self.templates = {}
+        self.lock = threading.Lock()
+
+    def admit(self, url):
+        """True si l'URL doit être testée (nouvelle et sous le quota de son template)."""
+        template = url_template(url)
+        with self.lock:
+            members = self.templates.setdefault(template, [])
+            if url in members:
+                return False
+            if self.max_per_template and len(members) >= self.max_per_template:
+                return False
+            members.append(url)
+            return True
+
+    def stats(self):
+        with self.lock:
+            return {
+                'templates': len(self.templates),
+                'representatives': sum(len(m) for m in self.templates.values())
+            }
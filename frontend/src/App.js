@@ -112,7 +112,7 @@ export default function VulnerabilityScanner() {
       
       console.log('Statut du scan:', data);
       
-      const wasRunning = currentScan?.status === 'running';
+      const wasRunning = ['queued', 'running'].includes(currentScan?.status);
       const isNowCompleted = data.status === 'completed';
       
       setCurrentScan(data);
@@ -136,15 +136,47 @@ export default function VulnerabilityScanner() {
     }
   }, [currentScan]);
 
-  // Polling
+  // Flux d'événements (SSE) du scan actif : l'état complet est chargé une fois
+  // (avec son curseur), puis seuls les changements sont reçus
+  const streamScanId = currentScan?.scan_id;
+  const streamCursor = currentScan && ['queued', 'starting', 'running', 'pausing', 'cancelling'].includes(currentScan.status)
+    ? currentScan.event_cursor
+    : null;
+
   useEffect(() => {
-    if (currentScan && (currentScan.status === 'running' || currentScan.status === 'starting')) {
-      const interval = setInterval(() => {
-        fetchScanStatus(currentScan.scan_id);
-      }, 2000);
-      return () => clearInterval(interval);
-    }
-  }, [currentScan, fetchScanStatus]);
+    if (streamCursor === null || streamCursor === undefined) return;
+
+    const source = new EventSource(`${API_URL}/scan/${streamScanId}/events?cursor=${streamCursor}`);
+    const merge = (event) => {
+      const data = JSON.parse(event.data);
+      setCurrentScan(prev => ({ ...prev, ...data }));
+      return data;
+    };
+    source.addEventListener('status', (event) => {
+      const data = merge(event);
+      if (data.status === 'completed' || data.status === 'failed') {
+        // État final complet (rapport, statistiques) et rafraîchissement de l'historique
+        fetchScanStatus(streamScanId);
+      }
+    });
+    source.addEventListener('progress', merge);
+    source.addEventListener('finding', (event) => {
+      const { index, vulnerability } = JSON.parse(event.data);
+      setCurrentScan(prev => {
+        const vulnerabilities = prev.vulnerabilities || [];
+        // Déjà comptée dans l'état chargé avant l'ouverture du flux
+        if (index < Math.max(vulnerabilities.length, prev.total_vulnerabilities || 0)) return prev;
+        return {
+          ...prev,
+          // Liste partielle (première page seulement) : les suivantes sont lues via /findings
+          vulnerabilities: index === vulnerabilities.length ? [...vulnerabilities, vulnerability] : vulnerabilities,
+          total_vulnerabilities: index + 1
+        };
+      });
+    });
+    source.addEventListener('end', () => source.close());
+    return () => source.close();
+  }, [streamScanId, streamCursor]);
 
   const handleScan = async () => {
     if (!url) {
@@ -165,7 +197,9 @@ export default function VulnerabilityScanner() {
         setCurrentScan({
           scan_id: data.scan_id,
           url: data.url,
-          status: 'running',
+          status: data.queue_position ? 'queued' : 'running',
+          queue_position: data.queue_position,
+          event_cursor: 0,
           progress: 0,
           vulnerabilities: [],
           total_vulnerabilities: 0
@@ -187,6 +221,22 @@ export default function VulnerabilityScanner() {
     }
   };
 
+  // Pause, reprise ou annulation du scan affiché
+  const controlScan = async (action) => {
+    if (!currentScan) return;
+    try {
+      const response = await fetch(`${API_URL}/scan/${currentScan.scan_id}/${action}`, { method: 'POST' });
+      const data = await response.json();
+      if (!response.ok) {
+        alert('Erreur: ' + data.error);
+        return;
+      }
+      fetchScanStatus(currentScan.scan_id);
+    } catch (error) {
+      alert('Erreur de connexion à l\'API: ' + error.message);
+    }
+  };
+
   const handleViewScan = (scanId) => {
     fetchScanStatus(scanId);
     setActiveTab('dashboard');
@@ -229,6 +279,7 @@ export default function VulnerabilityScanner() {
                 threads={threads} 
                 setThreads={setThreads} 
                 handleScan={handleScan} 
+                controlScan={controlScan} 
                 currentScan={currentScan} 
               />
 
@@ -250,6 +301,9 @@ export default function VulnerabilityScanner() {
             <VulnerabilityTable 
               vulnerabilities={currentScan?.vulnerabilities} 
               askExplain={askExplain} 
+              scanId={currentScan?.scan_id}
+              total={currentScan?.total_vulnerabilities}
+              API_URL={API_URL}
             />
 
             <HistoryPreview 
@@ -276,7 +330,6 @@ export default function VulnerabilityScanner() {
         ) : (
           /* Page Historique Complète */
           <HistoryPage 
-              scanHistory={scanHistory} // Vient du state de App.js
               loadHistory={loadHistory} // Fonction de App.js pour rafraichir
               onViewScan={handleViewScan} // Fonction de App.js pour voir le détail
               API_URL={API_URL} // Constante API
@@ -1,8 +1,9 @@
 import React from 'react';
-import { PlayCircle, RefreshCw } from 'lucide-react';
+import { PlayCircle, RefreshCw, PauseCircle, XCircle } from 'lucide-react';
 
-export default function QuickScan({ url, setUrl, threads, setThreads, handleScan, currentScan }) {
+export default function QuickScan({ url, setUrl, threads, setThreads, handleScan, controlScan, currentScan }) {
   const isRunning = currentScan?.status === 'running';
+  const isPaused = currentScan?.status === 'paused';
 
   return (
     <div className="bg-white rounded-lg shadow-md p-6">
@@ -68,8 +69,34 @@ export default function QuickScan({ url, setUrl, threads, setThreads, handleScan
               />
             </div>
             <p className="text-sm text-gray-600 text-center">{currentScan.progress}%</p>
+            <div className="flex space-x-2">
+              <button
+                onClick={() => controlScan('pause')}
+                className="flex-1 bg-yellow-500 hover:bg-yellow-600 text-white text-sm font-medium py-2 px-3 rounded-lg flex items-center justify-center space-x-1"
+              >
+                <PauseCircle className="w-4 h-4" />
+                <span>Pause</span>
+              </button>
+              <button
+                onClick={() => controlScan('cancel')}
+                className="flex-1 bg-red-600 hover:bg-red-700 text-white text-sm font-medium py-2 px-3 rounded-lg flex items-center justify-center space-x-1"
+              >
+                <XCircle className="w-4 h-4" />
+                <span>Annuler</span>
+              </button>
+            </div>
           </div>
         )}
+
+        {isPaused && (
+          <button
+            onClick={() => controlScan('resume')}
+            className="w-full bg-yellow-500 hover:bg-yellow-600 text-white text-sm font-medium py-2 px-4 rounded-lg flex items-center justify-center space-x-2"
+          >
+            <PlayCircle className="w-4 h-4" />
+            <span>Reprendre le scan</span>
+          </button>
+        )}
       </div>
     </div>
   );
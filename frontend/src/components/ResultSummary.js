@@ -30,7 +30,7 @@ export default function ResultSummary({ currentScan, downloadReport }) {
         <div className="flex items-center space-x-2">
           {currentScan.status === 'completed' ? (
             <CheckCircle className="w-5 h-5 text-green-500" />
-          ) : currentScan.status === 'running' || currentScan.status === 'starting' ? (
+          ) : ['queued', 'starting', 'running', 'pausing', 'cancelling'].includes(currentScan.status) ? (
             <Clock className="w-5 h-5 text-blue-500 animate-pulse" />
           ) : currentScan.status === 'failed' ? (
             <XCircle className="w-5 h-5 text-red-500" />
@@ -43,6 +43,11 @@ export default function ResultSummary({ currentScan, downloadReport }) {
               currentScan.status === 'completed' ? 'Terminé' :
               currentScan.status === 'failed' ? 'Échoué' :
               currentScan.status === 'starting' ? 'Démarrage' :
+              currentScan.status === 'pausing' ? 'Mise en pause' :
+              currentScan.status === 'paused' ? 'En pause' :
+              currentScan.status === 'cancelling' ? 'Annulation' :
+              currentScan.status === 'cancelled' ? 'Annulé' :
+              currentScan.status === 'queued' ? `En file d'attente${currentScan.queue_position ? ` (position ${currentScan.queue_position})` : ''}` :
               currentScan.status
             }</span>
           </p>
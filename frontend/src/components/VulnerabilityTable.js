@@ -1,4 +1,4 @@
-import React from 'react';
+import React, { useState, useEffect } from 'react';
 import { HelpCircle } from 'lucide-react';
 
 const getSeverityColor = (level) => {
@@ -11,12 +11,78 @@ const getSeverityColor = (level) => {
   }
 };
 
-export default function VulnerabilityTable({ vulnerabilities, askExplain }) {
+export default function VulnerabilityTable({ vulnerabilities, askExplain, scanId, total, API_URL }) {
+  // Pages suivantes et filtre par sévérité, lus via /api/scan/<id>/findings
+  const [severity, setSeverity] = useState('');
+  const [filtered, setFiltered] = useState([]);
+  const [filteredTotal, setFilteredTotal] = useState(0);
+  const [more, setMore] = useState([]);
+  const [isLoading, setIsLoading] = useState(false);
+
+  useEffect(() => {
+    setSeverity('');
+    setFiltered([]);
+    setMore([]);
+  }, [scanId]);
+
+  const fetchFindings = async (level, offset) => {
+    setIsLoading(true);
+    try {
+      const params = new URLSearchParams({ offset, limit: 50 });
+      if (level) params.set('severity', level);
+      const response = await fetch(`${API_URL}/scan/${scanId}/findings?${params}`);
+      if (!response.ok) return null;
+      return await response.json();
+    } catch (error) {
+      console.error(error);
+      return null;
+    } finally {
+      setIsLoading(false);
+    }
+  };
+
+  const changeSeverity = async (level) => {
+    setSeverity(level);
+    setFiltered([]);
+    if (!level) return;
+    const data = await fetchFindings(level, 0);
+    if (data) {
+      setFiltered(data.findings);
+      setFilteredTotal(data.total);
+    }
+  };
+
+  const baseRows = [...(vulnerabilities || []), ...more];
+  const rows = severity ? filtered : baseRows;
+  const rowsTotal = severity ? filteredTotal : (total || baseRows.length);
+
+  const loadMore = async () => {
+    const data = await fetchFindings(severity, rows.length);
+    if (!data) return;
+    if (severity) setFiltered([...filtered, ...data.findings]);
+    else setMore([...more, ...data.findings]);
+  };
+
   if (!vulnerabilities || vulnerabilities.length === 0) return null;
 
   return (
     <div className="mt-6 bg-white rounded-lg shadow-md p-6">
-      <h2 className="text-xl font-semibold text-gray-900 mb-4">Vulnérabilités Détectées (Tableau)</h2>
+      <div className="flex justify-between items-center mb-4">
+        <h2 className="text-xl font-semibold text-gray-900">Vulnérabilités Détectées (Tableau)</h2>
+        {scanId && (
+          <select
+            value={severity}
+            onChange={(e) => changeSeverity(e.target.value)}
+            className="px-3 py-2 border border-gray-300 rounded-md text-sm"
+          >
+            <option value="">Toutes sévérités</option>
+            <option value="CRITICAL">CRITICAL</option>
+            <option value="HIGH">HIGH</option>
+            <option value="MEDIUM">MEDIUM</option>
+            <option value="LOW">LOW</option>
+          </select>
+        )}
+      </div>
       
       <div className="overflow-x-auto">
         <table className="min-w-full divide-y divide-gray-200">
@@ -30,7 +96,7 @@ export default function VulnerabilityTable({ vulnerabilities, askExplain }) {
             </tr>
           </thead>
           <tbody className="bg-white divide-y divide-gray-200">
-            {vulnerabilities.map((vuln, index) => (
+            {rows.map((vuln, index) => (
               <tr key={index} className="hover:bg-gray-50">
                 <td className="px-6 py-4 text-sm font-medium text-gray-900">{vuln.type}</td>
                 <td className="px-6 py-4 text-sm text-gray-600 max-w-xs truncate">{vuln.url}</td>
@@ -56,6 +122,19 @@ export default function VulnerabilityTable({ vulnerabilities, askExplain }) {
           </tbody>
         </table>
       </div>
+
+      {scanId && rows.length < rowsTotal && (
+        <div className="mt-4 flex items-center justify-between text-sm text-gray-600">
+          <span>{rows.length} sur {rowsTotal} affichées</span>
+          <button
+            onClick={loadMore}
+            disabled={isLoading}
+            className="px-3 py-2 bg-gray-100 hover:bg-gray-200 text-gray-700 rounded-md transition-colors disabled:opacity-50"
+          >
+            Charger plus
+          </button>
+        </div>
+      )}
     </div>
   );
 }
\ No newline at end of file
@@ -1,25 +1,71 @@
-import React, { useState } from 'react';
+import React, { useState, useEffect, useCallback } from 'react';
 import { Trash2, Eye, RefreshCw, AlertTriangle, ChevronLeft, ChevronRight, FileText, Download } from 'lucide-react';
 
-export default function HistoryPage({ scanHistory, loadHistory, onViewScan, API_URL }) {
-  const [currentPage, setCurrentPage] = useState(1);
+const emptyFilters = { host: '', status: '', min_severity: '', from: '', to: '' };
+
+export default function HistoryPage({ loadHistory, onViewScan, API_URL }) {
   const itemsPerPage = 10;
   const [isLoading, setIsLoading] = useState(false);
+  const [filters, setFilters] = useState(emptyFilters);
+  const [currentItems, setCurrentItems] = useState([]);
+  // Curseurs des pages déjà visitées (null = première page) et de la suivante
+  const [cursors, setCursors] = useState([null]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const currentPage = cursors.length;
 
-  // --- Logique de Pagination ---
-  const indexOfLastItem = currentPage * itemsPerPage;
-  const indexOfFirstItem = indexOfLastItem - itemsPerPage;
-  const currentItems = scanHistory.slice(indexOfFirstItem, indexOfLastItem);
-  const totalPages = Math.ceil(scanHistory.length / itemsPerPage);
+  // --- Logique de Pagination (côté serveur, par curseur) ---
+  const fetchPage = useCallback(async (cursor) => {
+    const params = new URLSearchParams({ limit: itemsPerPage });
+    if (cursor) params.set('cursor', cursor);
+    Object.entries(filters).forEach(([key, value]) => {
+      if (value) params.set(key, value);
+    });
+
+    setIsLoading(true);
+    try {
+      const response = await fetch(`${API_URL}/history?${params}`);
+      if (response.ok) {
+        const data = await response.json();
+        setCurrentItems(data.scans || []);
+        setNextCursor(data.next_cursor || null);
+      } else {
+        setCurrentItems([]);
+        setNextCursor(null);
+      }
+    } catch (error) {
+      console.error(error);
+    } finally {
+      setIsLoading(false);
+    }
+  }, [API_URL, filters]);
+
+  // Nouveaux filtres : retour à la première page
+  useEffect(() => {
+    setCursors([null]);
+    fetchPage(null);
+  }, [fetchPage]);
+
+  const reloadPage = () => fetchPage(cursors[cursors.length - 1]);
 
   const nextPage = () => {
-    if (currentPage < totalPages) setCurrentPage(currentPage + 1);
+    if (!nextCursor) return;
+    setCursors([...cursors, nextCursor]);
+    fetchPage(nextCursor);
   };
 
   const prevPage = () => {
-    if (currentPage > 1) setCurrentPage(currentPage - 1);
+    if (cursors.length <= 1) return;
+    const previous = cursors.slice(0, -1);
+    setCursors(previous);
+    fetchPage(previous[previous.length - 1]);
   };
 
+  const updateFilter = (key, value) => {
+    setFilters({ ...filters, [key]: value });
+  };
+
+  const hasFilters = Object.values(filters).some(Boolean);
+
   // --- Actions ---
 
   const handleDelete = async (scanId) => {
@@ -31,7 +77,8 @@ export default function HistoryPage({ scanHistory, loadHistory, onViewScan, API_
         method: 'DELETE',
       });
       if (response.ok) {
-        await loadHistory(); // Demande à App.js de recharger la liste
+        await reloadPage();
+        loadHistory(); // Demande à App.js de recharger l'aperçu
       } else {
         alert("Erreur lors de la suppression");
       }
@@ -51,8 +98,9 @@ export default function HistoryPage({ scanHistory, loadHistory, onViewScan, API_
         method: 'DELETE',
       });
       if (response.ok) {
-        await loadHistory();
-        setCurrentPage(1);
+        setCursors([null]);
+        await fetchPage(null);
+        loadHistory();
       } else {
         alert("Erreur lors de la réinitialisation");
       }
@@ -78,14 +126,14 @@ export default function HistoryPage({ scanHistory, loadHistory, onViewScan, API_
         </div>
         <div className="flex space-x-3">
           <button 
-            onClick={loadHistory}
+            onClick={reloadPage}
             className="flex items-center px-3 py-2 bg-gray-100 hover:bg-gray-200 text-gray-700 rounded-md transition-colors"
           >
             <RefreshCw className={`w-4 h-4 mr-2 ${isLoading ? 'animate-spin' : ''}`} />
             Actualiser
           </button>
           
-          {scanHistory.length > 0 && (
+          {(currentItems.length > 0 || currentPage > 1) && (
             <button 
               onClick={handleReset}
               className="flex items-center px-3 py-2 bg-red-50 hover:bg-red-100 text-red-600 border border-red-200 rounded-md transition-colors"
@@ -97,8 +145,54 @@ export default function HistoryPage({ scanHistory, loadHistory, onViewScan, API_
         </div>
       </div>
 
+      {/* Filtres */}
+      <div className="grid grid-cols-1 md:grid-cols-5 gap-3 mb-6">
+        <input
+          type="text"
+          value={filters.host}
+          onChange={(e) => updateFilter('host', e.target.value.trim())}
+          placeholder="Hôte (ex: example.com)"
+          className="px-3 py-2 border border-gray-300 rounded-md text-sm"
+        />
+        <select
+          value={filters.status}
+          onChange={(e) => updateFilter('status', e.target.value)}
+          className="px-3 py-2 border border-gray-300 rounded-md text-sm"
+        >
+          <option value="">Tous les statuts</option>
+          <option value="completed">Terminé</option>
+          <option value="paused">En pause</option>
+          <option value="interrupted">Interrompu</option>
+        </select>
+        <select
+          value={filters.min_severity}
+          onChange={(e) => updateFilter('min_severity', e.target.value)}
+          className="px-3 py-2 border border-gray-300 rounded-md text-sm"
+        >
+          <option value="">Toutes sévérités</option>
+          <option value="LOW">LOW et plus</option>
+          <option value="MEDIUM">MEDIUM et plus</option>
+          <option value="HIGH">HIGH et plus</option>
+          <option value="CRITICAL">CRITICAL</option>
+        </select>
+        <input
+          type="date"
+          value={filters.from}
+          onChange={(e) => updateFilter('from', e.target.value)}
+          title="Depuis le"
+          className="px-3 py-2 border border-gray-300 rounded-md text-sm"
+        />
+        <input
+          type="date"
+          value={filters.to}
+          onChange={(e) => updateFilter('to', e.target.value)}
+          title="Jusqu'au"
+          className="px-3 py-2 border border-gray-300 rounded-md text-sm"
+        />
+      </div>
+
       {/* Tableau */}
-      {scanHistory.length > 0 ? (
+      {currentItems.length > 0 ? (
         <>
           <div className="overflow-x-auto">
             <table className="min-w-full divide-y divide-gray-200">
@@ -180,7 +274,7 @@ export default function HistoryPage({ scanHistory, loadHistory, onViewScan, API_
             <div className="hidden sm:flex sm:flex-1 sm:items-center sm:justify-between">
               <div>
                 <p className="text-sm text-gray-700">
-                  Affichage de <span className="font-medium">{indexOfFirstItem + 1}</span> à <span className="font-medium">{Math.min(indexOfLastItem, scanHistory.length)}</span> sur <span className="font-medium">{scanHistory.length}</span> résultats
+                  Affichage de <span className="font-medium">{(currentPage - 1) * itemsPerPage + 1}</span> à <span className="font-medium">{(currentPage - 1) * itemsPerPage + currentItems.length}</span>{nextCursor ? ' (suite disponible)' : ''}
                 </p>
               </div>
               <div>
@@ -193,11 +287,11 @@ export default function HistoryPage({ scanHistory, loadHistory, onViewScan, API_
                     <ChevronLeft className="h-5 w-5" aria-hidden="true" />
                   </button>
                   <span className="relative inline-flex items-center px-4 py-2 text-sm font-semibold text-gray-900 ring-1 ring-inset ring-gray-300 focus:outline-offset-0">
-                    {currentPage} / {totalPages}
+                    Page {currentPage}
                   </span>
                   <button
                     onClick={nextPage}
-                    disabled={currentPage === totalPages}
+                    disabled={!nextCursor}
                     className="relative inline-flex items-center rounded-r-md px-2 py-2 text-gray-400 ring-1 ring-inset ring-gray-300 hover:bg-gray-50 focus:z-20 focus:outline-offset-0 disabled:opacity-50"
                   >
                     <ChevronRight className="h-5 w-5" aria-hidden="true" />
@@ -210,8 +304,8 @@ export default function HistoryPage({ scanHistory, loadHistory, onViewScan, API_
       ) : (
         <div className="text-center py-12">
           <AlertTriangle className="mx-auto h-12 w-12 text-gray-300" />
-          <h3 className="mt-2 text-sm font-semibold text-gray-900">Aucun historique</h3>
-          <p className="mt-1 text-sm text-gray-500">Lancez un scan pour voir apparaître des résultats ici.</p>
+          <h3 className="mt-2 text-sm font-semibold text-gray-900">{hasFilters ? 'Aucun scan ne correspond aux filtres' : 'Aucun historique'}</h3>
+          <p className="mt-1 text-sm text-gray-500">{hasFilters ? 'Modifiez ou videz les filtres.' : 'Lancez un scan pour voir apparaître des résultats ici.'}</p>
         </div>
       )}
     </div>